@@ -0,0 +1,46 @@
+"""Общая подготовка окружения Django для бенчмарков.
+
+Бенчмарки запускаются из корня репозитория, например:
+    python benchmarks/pagination.py
+и работают на временной тестовой базе, не трогая db.sqlite3.
+"""
+import os
+import sys
+import time
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'yatube'))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.db import connection  # noqa: E402
+from django.test.utils import (  # noqa: E402
+    setup_test_environment, teardown_test_environment
+)
+
+
+@contextmanager
+def test_database():
+    """Создаёт и после работы удаляет временную тестовую базу."""
+    setup_test_environment()
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def timeit(func, repeat=20):
+    """Лучшее время выполнения func в миллисекундах."""
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
@@ -0,0 +1,85 @@
+"""Размер ответа и время запроса JSON API по адресам.
+
+    python benchmarks/api.py [постов]
+
+Каждый адрес запрашивается со всеми полями и с узким набором fields=,
+который нужен клиенту для списка.
+"""
+import sys
+from io import StringIO
+
+from _django import test_database, timeit
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+POST_LIST = 'id,author,pub_date'
+
+
+def fill(posts):
+    group = Group.objects.create(title='Группа', slug='group')
+    authors = [
+        User.objects.create_user(username=f'author_{i}', first_name='Имя')
+        for i in range(10)
+    ]
+    reader = User.objects.create_user(username='reader')
+    Follow.objects.bulk_create(
+        Follow(user=reader, author=author) for author in authors
+    )
+    Post.objects.bulk_create(
+        Post(
+            text=f'Пост № {i}. ' + 'Текст поста. ' * 40,
+            author=authors[i % len(authors)],
+            group=group if i % 2 else None,
+        )
+        for i in range(posts)
+    )
+    post = Post.objects.first()
+    Comment.objects.bulk_create(
+        Comment(post=post, author=reader, text=f'Комментарий {i}')
+        for i in range(50)
+    )
+    call_command('rebuild_timelines', stdout=StringIO())
+    return reader, post
+
+
+def main(posts):
+    with test_database():
+        reader, post = fill(posts)
+        client = Client()
+        client.force_login(reader)
+        endpoints = {
+            reverse('posts:api_posts'): POST_LIST,
+            reverse('posts:api_post', args=[post.pk]): 'id,text',
+            reverse('posts:api_post_comments', args=[post.pk]):
+                'id,author,created',
+            reverse('posts:api_group_posts', args=['group']): POST_LIST,
+            reverse('posts:api_profile', args=['author_0']):
+                'username,posts_count',
+            reverse('posts:api_profile_posts', args=['author_0']): POST_LIST,
+            reverse('posts:api_follow'): POST_LIST,
+        }
+        print(f'{posts} posts')
+        for url, sparse in endpoints.items():
+            for params in ({}, {'fields': sparse}):
+                cache.clear()
+                size = len(client.get(url, params).content)
+
+                def request():
+                    client.get(url, params)
+                label = params.get('fields', 'all fields')
+                print(
+                    f'{url:<32} {label:<22} {size:6} bytes '
+                    f'{timeit(request):8.2f} ms'
+                )
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:2]] or [2000])
@@ -0,0 +1,81 @@
+"""Сравнение бэкендов кэша: LocMemCache, FileBasedCache и SQLiteCache.
+
+    python benchmarks/cache_backends.py [число операций]
+
+Время — микросекунды на операцию в одном процессе. Для LocMemCache это
+нижняя граница: его записи не видны другим процессам сервера.
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+from _django import timeit
+
+from django.core.cache.backends.filebased import FileBasedCache
+from django.core.cache.backends.locmem import LocMemCache
+
+from core.sqlite_cache import SQLiteCache
+
+# Отрисованная карточка поста — типичное значение в кэше.
+VALUE = '<div class="card">' + 'x' * 2000 + '</div>'
+
+MANY = 20
+
+
+def backends(directory):
+    options = {'OPTIONS': {'MAX_ENTRIES': 100000}}
+    return {
+        'LocMemCache': LocMemCache('bench', options),
+        'FileBasedCache': FileBasedCache(
+            os.path.join(directory, 'files'), options
+        ),
+        'SQLiteCache': SQLiteCache(
+            os.path.join(directory, 'cache.sqlite3'), options
+        ),
+    }
+
+
+def each(func, items):
+    return lambda: [func(item) for item in items]
+
+
+def operations(cache, total):
+    keys = [f'card:{i}' for i in range(total)]
+    chunks = [keys[start:start + MANY] for start in range(0, total, MANY)]
+    cache.set('counter', 0)
+    return {
+        'set': each(lambda key: cache.set(key, VALUE), keys),
+        'get (hit)': each(cache.get, keys),
+        'get (miss)': each(lambda key: cache.get(f'missing:{key}'), keys),
+        f'get_many({MANY}) / key': each(cache.get_many, chunks),
+        f'set_many({MANY}) / key': each(
+            lambda chunk: cache.set_many(dict.fromkeys(chunk, VALUE)), chunks
+        ),
+        'incr': each(lambda key: cache.incr('counter'), keys),
+    }
+
+
+def main(total):
+    directory = tempfile.mkdtemp()
+    try:
+        caches = backends(directory)
+        results = {
+            name: {
+                operation: timeit(func, repeat=3) * 1000 / total
+                for operation, func in operations(cache, total).items()
+            }
+            for name, cache in caches.items()
+        }
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+    print(f'{total} operations, microseconds per operation')
+    print(f'{"":>24}' + ''.join(f'{name:>16}' for name in results))
+    for operation in next(iter(results.values())):
+        print(f'{operation:>24}' + ''.join(
+            f'{times[operation]:16.1f}' for times in results.values()
+        ))
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000)
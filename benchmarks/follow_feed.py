@@ -0,0 +1,79 @@
+"""Сравнение движков ленты подписок (FOLLOW_FEED_ENGINE).
+
+    python benchmarks/follow_feed.py [авторов] [постов у автора]
+
+Кэш увеличен так, чтобы в него поместились кэши всех авторов: при
+стандартных 300 записях LocMemCache движок merge на каждом запросе
+заново собирает вытесненные списки из базы.
+"""
+import sys
+from io import StringIO
+
+from _django import test_database, timeit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import override_settings
+
+from posts.models import Follow, Post
+from posts.timelines import FOLLOW_FEED_ENGINES, get_follow_paginator
+
+User = get_user_model()
+
+
+def fill(authors, posts_per_author):
+    User.objects.bulk_create(
+        User(username=f'author_{i}') for i in range(authors)
+    )
+    reader = User.objects.create_user(username='reader')
+    author_ids = list(
+        User.objects.exclude(pk=reader.pk).values_list('pk', flat=True)
+    )
+    Follow.objects.bulk_create(
+        Follow(user=reader, author_id=pk) for pk in author_ids
+    )
+    for i in range(posts_per_author):
+        Post.objects.bulk_create(
+            Post(text=f'Пост № {i}', author_id=pk) for pk in author_ids
+        )
+    call_command('rebuild_timelines', stdout=StringIO())
+    return reader
+
+
+def main(authors, posts_per_author):
+    caches = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'OPTIONS': {'MAX_ENTRIES': authors * 2},
+        }
+    }
+    with test_database(), override_settings(CACHES=caches):
+        reader = fill(authors, posts_per_author)
+        per_page = settings.NUMBER_OF_POSTS
+        print(
+            f'{authors} authors followed, '
+            f'{authors * posts_per_author} posts in feed'
+        )
+        for engine in FOLLOW_FEED_ENGINES:
+            with override_settings(FOLLOW_FEED_ENGINE=engine):
+                cache.clear()
+                first = get_follow_paginator(reader, per_page).get_page({})
+
+                def page_1():
+                    list(get_follow_paginator(reader, per_page).get_page({}))
+
+                def page_2():
+                    list(get_follow_paginator(reader, per_page).get_page(
+                        {'after': first.next_cursor}
+                    ))
+                print(
+                    f'{engine:>10}: page 1 {timeit(page_1):8.2f} ms, '
+                    f'page 2 {timeit(page_2):8.2f} ms'
+                )
+
+
+if __name__ == '__main__':
+    args = [int(arg) for arg in sys.argv[1:3]]
+    main(*(args + [1000, 50][len(args):]))
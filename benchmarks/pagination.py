@@ -0,0 +1,61 @@
+"""Сравнение OFFSET-пагинации и курсорной на первой и дальней страницах.
+
+    python benchmarks/pagination.py [число постов]
+"""
+import sys
+
+from _django import test_database, timeit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+
+from posts.models import Post
+from posts.paginator import CursorPaginator
+
+PER_PAGE = settings.NUMBER_OF_POSTS
+
+
+def fill(total):
+    author = get_user_model().objects.create_user(username='bench')
+    batch = 10000
+    for start in range(0, total, batch):
+        Post.objects.bulk_create(
+            Post(text=f'Пост № {i}', author=author)
+            for i in range(start, min(start + batch, total))
+        )
+
+
+def main(total):
+    with test_database():
+        fill(total)
+        deep = total // PER_PAGE
+        posts = Post.objects.all()
+        # Курсор дальней страницы: последний пост предыдущей страницы.
+        last_before_deep = posts.order_by('-pub_date', '-pk')[
+            (deep - 1) * PER_PAGE - 1
+        ]
+        cursor = CursorPaginator(posts, PER_PAGE).cursor_for(
+            last_before_deep
+        )
+        results = {
+            'offset, page 1': lambda: list(
+                Paginator(posts, PER_PAGE).get_page(1)
+            ),
+            f'offset, page {deep}': lambda: list(
+                Paginator(posts, PER_PAGE).get_page(deep)
+            ),
+            'cursor, page 1': lambda: list(
+                CursorPaginator(posts, PER_PAGE).get_page({})
+            ),
+            f'cursor, page {deep}': lambda: list(
+                CursorPaginator(posts, PER_PAGE).get_page({'after': cursor})
+            ),
+        }
+        print(f'{total} posts, {PER_PAGE} per page')
+        for name, func in results.items():
+            print(f'{name:>24}: {timeit(func):8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,65 @@
+"""Сравнение поиска LIKE '%...%' и полнотекстового индекса FTS5.
+
+    python benchmarks/search.py [число постов]
+"""
+import random
+import sys
+
+from _django import test_database, timeit
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+
+from posts.models import Post
+from posts.search import add_snippets
+
+PER_PAGE = settings.NUMBER_OF_POSTS
+
+WORDS = [f'слово{i:04}' for i in range(5000)]
+
+
+def fill(total):
+    author = get_user_model().objects.create_user(username='bench')
+    rnd = random.Random(1)
+    batch = 10000
+    for start in range(0, total, batch):
+        Post.objects.bulk_create(
+            Post(text=' '.join(rnd.choices(WORDS, k=40)), author=author)
+            for _ in range(start, min(start + batch, total))
+        )
+
+
+def main(total):
+    with test_database():
+        fill(total)
+        word = WORDS[42]
+        missing = 'отсутствует'
+
+        def fts_page(query):
+            posts = list(
+                Post.objects.search(query).order_by('-score', '-pk')[:PER_PAGE]
+            )
+            add_snippets(posts, query)
+            return posts
+
+        results = {
+            'LIKE, first page': lambda: list(
+                Post.objects.filter(text__icontains=word)[:PER_PAGE]
+            ),
+            'LIKE, count': lambda: Post.objects.filter(
+                text__icontains=word
+            ).count(),
+            'LIKE, no match': lambda: list(
+                Post.objects.filter(text__icontains=missing)[:PER_PAGE]
+            ),
+            'FTS5, first page': lambda: fts_page(word),
+            'FTS5, count': lambda: Post.objects.matching(word).count(),
+            'FTS5, no match': lambda: fts_page(missing),
+        }
+        print(f'{total} posts, {PER_PAGE} per page, query {word!r}')
+        for name, func in results.items():
+            print(f'{name:>24}: {timeit(func, repeat=5):8.2f} ms')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000)
@@ -0,0 +1,70 @@
+"""Сжатие загружаемых картинок: размер до и после posts.images.normalize.
+
+    python benchmarks/upload_images.py
+
+Картинки синтетические: снимок камеры с EXIF и вшитым превью,
+скриншот PNG и маленький GIF (см. _images.py).
+"""
+import random
+import time
+from io import BytesIO
+
+import _django  # noqa: F401
+from _images import SMALL_GIF
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from PIL import Image, ImageFilter
+
+from posts.images import normalize
+
+
+def photo(size=(4000, 3000)):
+    rnd = random.Random(1)
+    small = Image.new('RGB', (size[0] // 50, size[1] // 50))
+    small.putdata([
+        tuple(rnd.randrange(256) for _ in range(3))
+        for _ in range(small.width * small.height)
+    ])
+    image = small.resize(size, Image.BICUBIC).filter(
+        ImageFilter.GaussianBlur(3)
+    )
+    preview = BytesIO()
+    image.resize((320, 240)).save(preview, 'JPEG', quality=80)
+    exif = Image.Exif()
+    exif[0x0112] = 6  # Orientation
+    exif[0x010F] = 'Camera maker'
+    exif[0x927C] = preview.getvalue()  # MakerNote с превью
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=95, exif=exif.tobytes())
+    return 'photo.jpg', buffer.getvalue()
+
+
+def screenshot(size=(2560, 1600)):
+    image = Image.new('RGB', size, 'white')
+    for top in range(0, size[1], 40):
+        image.paste((30, 60, 90), (100, top, size[0] - 100, top + 12))
+    buffer = BytesIO()
+    image.save(buffer, 'PNG')
+    return 'screenshot.png', buffer.getvalue()
+
+
+def main():
+    samples = [photo(), screenshot(), ('small.gif', SMALL_GIF)]
+    total_before = total_after = 0
+    for name, content in samples:
+        started = time.perf_counter()
+        result = normalize(SimpleUploadedFile(name, content))
+        elapsed = (time.perf_counter() - started) * 1000
+        with Image.open(result) as image:
+            size = '{}x{}'.format(*image.size)
+        before, after = len(content), result.size
+        total_before += before
+        total_after += after
+        print(f'{name:>16}: {before:>10,} -> {after:>10,} bytes '
+              f'({after / before:6.1%}), {size:>10}, {elapsed:7.1f} ms')
+    print(f'{"total":>16}: {total_before:>10,} -> {total_after:>10,} bytes '
+          f'({total_after / total_before:6.1%})')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,159 @@
+"""Кэш с инвалидацией по тегам.
+
+Каждый тег (например, `post:1` или `feed:index`) хранит в кэше
+случайную версию. Ключ записи включает версии всех её тегов, поэтому
+invalidate() меняет версию тега, и все записи с ним перестают
+находиться, а остальные записи остаются в кэше.
+
+get_or_set() защищает дорогие записи от лавины пересчётов. Последнее
+значение записи хранится ещё и под ключом без версий, поэтому после
+сброса тега или истечения записи её пересчитывает один процесс (тот,
+кто взял замок), а остальные отдают прежнее значение. Кроме того,
+запись пересчитывается заранее с вероятностью, растущей к концу её
+жизни и со временем пересчёта (XFetch), так что горячие записи
+обновляются до истечения. Срок записи и время её пересчёта хранятся
+под отдельным ключом вне L1 (см. core/tiered_cache.py): иначе другие
+процессы видели бы в L1 прежний срок и пересчитывали запись снова.
+
+Прежнее значение собрано при старых версиях тегов, поэтому страница с
+ним не должна получить ETag из новых версий: condition() убирает ETag
+с ответа, в который попал прежний фрагмент.
+"""
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.views.decorators import http
+
+TAG_KEY_PREFIX = 'cache_tag'
+
+# Через сколько секунд замок пересчёта считается брошенным.
+LOCK_TIMEOUT = 30
+
+# Чем больше, тем раньше пересчитываются записи (XFetch).
+EARLY_RECOMPUTE_BETA = 1.0
+
+
+def _tag_key(tag):
+    # В тегах бывают slug и имена на любом языке: в ключ идёт их хэш.
+    return f'{TAG_KEY_PREFIX}:{hashlib.md5(tag.encode()).hexdigest()}'
+
+
+def get_versions(tags):
+    """Возвращает текущие версии тегов, заводя недостающие."""
+    keys = [_tag_key(tag) for tag in tags]
+    versions = cache.get_many(keys)
+    missing = {key: uuid4().hex for key in keys if key not in versions}
+    if missing:
+        cache.set_many(missing, None)
+        versions.update(missing)
+    return [versions[key] for key in keys]
+
+
+def make_key(name, vary_on=(), tags=()):
+    """Ключ записи с учётом аргументов и версий её тегов."""
+    args = hashlib.md5(
+        ':'.join(str(value) for value in vary_on).encode()
+    ).hexdigest()
+    stamp = hashlib.md5(':'.join(get_versions(tags)).encode()).hexdigest()
+    return f'tagged.{name}.{args}.{stamp}'
+
+
+def etag(vary_on=(), tags=()):
+    """Слабый ETag страницы с аргументами vary_on и тегами tags.
+
+    Версии тегов читаются из кэша, без запросов к базе и отрисовки.
+    """
+    digest = hashlib.md5(
+        ':'.join([*(str(value) for value in vary_on), *get_versions(tags)])
+        .encode()
+    ).hexdigest()
+    return f'W/"{digest}"'
+
+
+def invalidate(*tags):
+    """Сбрасывает все записи, помеченные любым из тегов."""
+    cache.set_many({_tag_key(tag): uuid4().hex for tag in tags}, None)
+
+
+def _stale_key(key):
+    """Ключ последнего значения записи key: без версий тегов."""
+    return 'stale.' + key.rsplit('.', 1)[0]
+
+
+def _refresh_key(key):
+    """Ключ срока записи key; префикс не попадает в L1."""
+    return 'refresh.' + key
+
+
+def _needs_refresh(expires, delta, now):
+    return now - delta * EARLY_RECOMPUTE_BETA * math.log(
+        1 - random.random()
+    ) >= expires
+
+
+def get_or_set(name, compute, timeout, vary_on=(), tags=(),
+               on_stale=None):
+    """Значение записи name или результат compute() без лавины.
+
+    Пока один процесс пересчитывает запись, остальные получают её
+    прежнее значение, и для них вызывается on_stale(). Если прежнего
+    значения нет, compute() вызывают все: ждать некого.
+    """
+    key = make_key(name, vary_on, tags)
+    now = time.time()
+    found = cache.get_many([key, _refresh_key(key)])
+    if key in found:
+        refresh = found.get(_refresh_key(key))
+        if refresh is not None and not _needs_refresh(*refresh, now):
+            return found[key]
+        stale = found[key]
+    else:
+        stale = cache.get(_stale_key(key))
+    lock_key = f'lock.{_stale_key(key)}'
+    if stale is not None and not cache.add(lock_key, True, LOCK_TIMEOUT):
+        if on_stale is not None:
+            on_stale()
+        return stale
+    try:
+        value = compute()
+        delta = time.time() - now
+        cache.set_many({
+            key: value,
+            _refresh_key(key): (now + timeout, delta),
+            _stale_key(key): value,
+        }, timeout * 2)
+    finally:
+        if stale is not None:
+            cache.delete(lock_key)
+    return value
+
+
+def mark_stale(request):
+    """Отмечает, что в ответ на request попал прежний фрагмент."""
+    request.tagged_cache_stale = True
+
+
+def condition(etag_func):
+    """django.views.decorators.http.condition для страниц с ETag из
+    версий тегов.
+
+    Если страница собрана с прежним фрагментом (см. mark_stale), ETag
+    с ответа снимается: клиент не закрепит старое тело за новыми
+    версиями тегов и переспросит страницу.
+    """
+    def decorator(view):
+        conditional = http.condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def inner(request, *args, **kwargs):
+            response = conditional(request, *args, **kwargs)
+            if getattr(request, 'tagged_cache_stale', False):
+                del response['ETag']
+            return response
+        return inner
+    return decorator
@@ -0,0 +1,30 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает попадания и промахи уровней кэша по всем процессам: '
+        'по ним подбирается L1_MAX_ENTRIES.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset',
+            action='store_true',
+            help='Обнулить счётчики после вывода.',
+        )
+
+    def handle(self, *args, **options):
+        if not hasattr(cache, 'stats'):
+            raise CommandError('Кэш default не двухуровневый.')
+        stats = cache.stats()
+        for tier in ('l1', 'l2'):
+            hits = stats[f'{tier}_hits']
+            total = hits + stats[f'{tier}_misses']
+            ratio = hits / total if total else 0
+            self.stdout.write(
+                f'{tier.upper()}: попаданий {hits} из {total} ({ratio:.1%})'
+            )
+        if options['reset']:
+            cache.reset_stats()
@@ -0,0 +1,288 @@
+"""Кэш в файле SQLite, общий для всех процессов сервера на машине.
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.sqlite_cache.SQLiteCache',
+            'LOCATION': '/var/tmp/yatube-cache.sqlite3',
+            'OPTIONS': {'MAX_ENTRIES': 10000},
+        }
+    }
+
+База работает в режиме WAL: читатели не ждут писателей и друг друга,
+а файл читается через mmap. Запись идёт в транзакции BEGIN IMMEDIATE,
+поэтому add и incr атомарны и между процессами.
+
+Число записей ограничено MAX_ENTRIES. Когда оно превышено, удаляются
+истёкшие записи, а если их мало — MAX_ENTRIES // CULL_FREQUENCY
+записей, которые дольше всех не читали (LRU). Время чтения обновляется
+не чаще раза в ACCESS_RESOLUTION секунд, чтобы чтение горячих ключей
+не превращалось в запись.
+"""
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+ACCESS_RESOLUTION = 1
+
+# Ограничение SQLite на число параметров запроса.
+MAX_PARAMS = 900
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS cache (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    expires REAL,
+    accessed REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cache_accessed ON cache (accessed);
+CREATE TABLE IF NOT EXISTS cache_size (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO cache_size VALUES (0, 0);
+CREATE TRIGGER IF NOT EXISTS cache_insert AFTER INSERT ON cache BEGIN
+    UPDATE cache_size SET entries = entries + 1;
+END;
+CREATE TRIGGER IF NOT EXISTS cache_delete AFTER DELETE ON cache BEGIN
+    UPDATE cache_size SET entries = entries - 1;
+END;
+"""
+
+UPSERT_SQL = """
+INSERT INTO cache (key, value, expires, accessed) VALUES (?, ?, ?, ?)
+ON CONFLICT (key) DO UPDATE SET
+    value = excluded.value,
+    expires = excluded.expires,
+    accessed = excluded.accessed
+"""
+
+# Истёкшая запись заменяется, живая остаётся.
+ADD_SQL = UPSERT_SQL + 'WHERE cache.expires <= ?'
+
+LIVE = '(expires IS NULL OR expires > ?)'
+
+
+def _chunks(keys):
+    keys = list(keys)
+    for start in range(0, len(keys), MAX_PARAMS):
+        yield keys[start:start + MAX_PARAMS]
+
+
+def _placeholders(keys):
+    return ', '.join('?' * len(keys))
+
+
+class SQLiteCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        self._path = location
+        self._local = threading.local()
+
+    def _connection(self):
+        # Соединение своё у каждого потока и у каждого процесса после
+        # fork.
+        local = self._local
+        if getattr(local, 'pid', None) != os.getpid():
+            connection = sqlite3.connect(
+                self._path, timeout=30, isolation_level=None
+            )
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            connection.execute('PRAGMA mmap_size = 268435456')
+            connection.executescript(SCHEMA_SQL)
+            local.connection = connection
+            local.pid = os.getpid()
+        return local.connection
+
+    @contextmanager
+    def _write(self):
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _cull(self, connection, now):
+        entries, = connection.execute(
+            'SELECT entries FROM cache_size'
+        ).fetchone()
+        if entries <= self._max_entries:
+            return
+        if not self._cull_frequency:
+            connection.execute('DELETE FROM cache')
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE expires <= ?', (now,)
+        )
+        entries, = connection.execute(
+            'SELECT entries FROM cache_size'
+        ).fetchone()
+        if entries <= self._max_entries:
+            return
+        connection.execute(
+            'DELETE FROM cache WHERE key IN ('
+            'SELECT key FROM cache ORDER BY accessed LIMIT ?)',
+            (self._max_entries // self._cull_frequency,)
+        )
+
+    def _touch_accessed(self, keys, now):
+        try:
+            with self._write() as connection:
+                for chunk in _chunks(keys):
+                    connection.execute(
+                        f'UPDATE cache SET accessed = ? '
+                        f'WHERE key IN ({_placeholders(chunk)})',
+                        (now, *chunk)
+                    )
+        except sqlite3.OperationalError:
+            # База занята: время чтения обновится при следующем.
+            pass
+
+    def _get_rows(self, keys):
+        """Живые записи keys: {ключ: значение}."""
+        now = time.time()
+        connection = self._connection()
+        values = {}
+        stale = []
+        for chunk in _chunks(keys):
+            rows = connection.execute(
+                f'SELECT key, value, accessed FROM cache '
+                f'WHERE key IN ({_placeholders(chunk)}) AND {LIVE}',
+                (*chunk, now)
+            )
+            for key, value, accessed in rows:
+                values[key] = pickle.loads(value)
+                if accessed < now - ACCESS_RESOLUTION:
+                    stale.append(key)
+        if stale:
+            self._touch_accessed(stale, now)
+        return values
+
+    def get(self, key, default=None, version=None):
+        key = self._key(key, version)
+        return self._get_rows([key]).get(key, default)
+
+    def get_many(self, keys, version=None):
+        made = {self._key(key, version): key for key in keys}
+        return {
+            made[key]: value
+            for key, value in self._get_rows(list(made)).items()
+        }
+
+    def has_key(self, key, version=None):
+        key = self._key(key, version)
+        row = self._connection().execute(
+            f'SELECT 1 FROM cache WHERE key = ? AND {LIVE}',
+            (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    def _set_rows(self, data, timeout):
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        with self._write() as connection:
+            if expires is not None and expires <= now:
+                for chunk in _chunks(data):
+                    connection.execute(
+                        f'DELETE FROM cache '
+                        f'WHERE key IN ({_placeholders(chunk)})',
+                        chunk
+                    )
+                return
+            connection.executemany(UPSERT_SQL, (
+                (
+                    key,
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                    expires,
+                    now,
+                )
+                for key, value in data.items()
+            ))
+            self._cull(connection, now)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self._set_rows({self._key(key, version): value}, timeout)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        self._set_rows(
+            {self._key(key, version): value for key, value in data.items()},
+            timeout
+        )
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        expires = self.get_backend_timeout(timeout)
+        with self._write() as connection:
+            cursor = connection.execute(
+                ADD_SQL,
+                (
+                    key,
+                    pickle.dumps(value, pickle.HIGHEST_PROTOCOL),
+                    expires,
+                    now,
+                    now,
+                )
+            )
+            added = cursor.rowcount > 0
+            if added:
+                self._cull(connection, now)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as connection:
+            cursor = connection.execute(
+                f'UPDATE cache SET expires = ?, accessed = ? '
+                f'WHERE key = ? AND {LIVE}',
+                (self.get_backend_timeout(timeout), now, key, now)
+            )
+        return cursor.rowcount > 0
+
+    def incr(self, key, delta=1, version=None):
+        key = self._key(key, version)
+        now = time.time()
+        with self._write() as connection:
+            row = connection.execute(
+                f'SELECT value FROM cache WHERE key = ? AND {LIVE}',
+                (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError(f"Key '{key}' not found")
+            value = pickle.loads(row[0]) + delta
+            connection.execute(
+                'UPDATE cache SET value = ?, accessed = ? WHERE key = ?',
+                (pickle.dumps(value, pickle.HIGHEST_PROTOCOL), now, key)
+            )
+        return value
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = [self._key(key, version) for key in keys]
+        with self._write() as connection:
+            for chunk in _chunks(keys):
+                connection.execute(
+                    f'DELETE FROM cache WHERE key IN ({_placeholders(chunk)})',
+                    chunk
+                )
+
+    def clear(self):
+        with self._write() as connection:
+            connection.execute('DELETE FROM cache')
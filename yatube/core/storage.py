@@ -0,0 +1,51 @@
+"""Файловое хранилище с именами по содержимому.
+
+Файл posts/photo.jpg сохраняется как posts/ab/cd/abcd….jpg, где
+abcd… — SHA-256 содержимого. Первые символы хэша раскладывают файлы
+по SHARD_DEPTH уровням каталогов (не больше 256 записей на уровне),
+а одинаковое содержимое хранится один раз: повторная загрузка
+возвращает имя уже сохранённого файла и обновляет время его изменения,
+чтобы сборщик мусора (collect_media) не удалил файл, который снова
+понадобился.
+"""
+import hashlib
+import os
+import posixpath
+
+from django.core.files.storage import FileSystemStorage
+from django.utils.deconstruct import deconstructible
+
+SHARD_DEPTH = 2
+SHARD_WIDTH = 2
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+@deconstructible
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, который называет файлы хэшем содержимого."""
+
+    def content_name(self, name, content):
+        """Имя файла content, загружаемого под именем name."""
+        directory, filename = posixpath.split(name)
+        extension = os.path.splitext(filename)[1].lower()
+        digest = content_hash(content)
+        shards = [
+            digest[i * SHARD_WIDTH:(i + 1) * SHARD_WIDTH]
+            for i in range(SHARD_DEPTH)
+        ]
+        return posixpath.join(directory, *shards, digest + extension)
+
+    def _save(self, name, content):
+        name = self.content_name(name, content)
+        if self.exists(name):
+            os.utime(self.path(name))
+            return name
+        # Если тот же файл одновременно пишет другой процесс,
+        # FileSystemStorage сохранит копию под именем с суффиксом.
+        return super()._save(name, content)
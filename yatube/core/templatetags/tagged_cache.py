@@ -0,0 +1,98 @@
+import re
+
+from django import template
+from django.conf import settings
+from django.utils.safestring import mark_safe
+
+from core import cache_tags
+
+register = template.Library()
+
+# Экранированный вывод не может содержать "<", поэтому метку
+# нельзя подделать текстом поста.
+DONUT_MARKER = '<!--donut:{}-->'
+DONUT_RE = re.compile(r'<!--donut:([\w./-]+)-->')
+
+
+def fill_donuts(content, context):
+    """Заменяет метки {% donut %} шаблонами, отрисованными для
+    текущего запроса.
+    """
+    engine = context.template.engine
+
+    def render(match):
+        return engine.get_template(match.group(1)).render(context)
+
+    return mark_safe(DONUT_RE.sub(render, content))
+
+
+class TaggedCacheNode(template.Node):
+    def __init__(self, nodelist, fragment_name, vary_on, tags):
+        self.nodelist = nodelist
+        self.fragment_name = fragment_name
+        self.vary_on = vary_on
+        self.tags = tags
+
+    def render(self, context):
+        vary_on = [var.resolve(context) for var in self.vary_on]
+        tags = [tag.resolve(context) for tag in self.tags]
+        request = context.get('request')
+        value = cache_tags.get_or_set(
+            self.fragment_name,
+            lambda: self.nodelist.render(context),
+            settings.PAGE_CACHE_TIMEOUT,
+            vary_on,
+            tags,
+            on_stale=(
+                None if request is None
+                else lambda: cache_tags.mark_stale(request)
+            ),
+        )
+        return fill_donuts(value, context)
+
+
+@register.tag
+def tagged_cache(parser, token):
+    """Кэширует фрагмент до сброса любого из его тегов.
+
+    {% tagged_cache имя [var1 var2 ...] tags тег1 [тег2 ...] %}
+        ...
+    {% endtagged_cache %}
+
+    Запись живёт PAGE_CACHE_TIMEOUT секунд, если ни один тег не
+    сброшен через core.cache_tags.invalidate(). Пока один запрос
+    отрисовывает фрагмент заново, остальные получают прежний (см.
+    core.cache_tags.get_or_set), а их ответы остаются без ETag (см.
+    core.cache_tags.condition). Части, зависящие от пользователя,
+    выносятся из кэша тегом {% donut %}.
+    """
+    nodelist = parser.parse(('endtagged_cache',))
+    parser.delete_first_token()
+    bits = token.split_contents()
+    if 'tags' not in bits[2:]:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]!r} tag requires a fragment name and tags.'
+        )
+    split = bits.index('tags', 2)
+    return TaggedCacheNode(
+        nodelist,
+        bits[1],
+        [parser.compile_filter(bit) for bit in bits[2:split]],
+        [parser.compile_filter(bit) for bit in bits[split + 1:]],
+    )
+
+
+@register.filter
+def cache_tag(kind, ident):
+    """Собирает имя тега: {{ 'author'|cache_tag:author.pk }}."""
+    return f'{kind}:{ident}'
+
+
+@register.simple_tag
+def donut(template_name):
+    """Оставляет в кэшируемом фрагменте «дырку» под шаблон, который
+    отрисовывается заново на каждый запрос:
+
+    {% donut 'posts/includes/switcher.html' %}
+    """
+    return mark_safe(DONUT_MARKER.format(template_name))
@@ -0,0 +1,37 @@
+"""Запуск тестов с кэшем во временном файле."""
+import copy
+import os
+import shutil
+import tempfile
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+
+@contextmanager
+def temporary_cache():
+    """Общий кэш в пустом файле, который удаляется после тестов.
+
+    Так тесты не видят записей запущенного сервера и прошлых прогонов.
+    """
+    directory = tempfile.mkdtemp()
+    caches = copy.deepcopy(settings.CACHES)
+    caches['shared']['LOCATION'] = os.path.join(directory, 'cache.sqlite3')
+    try:
+        with override_settings(CACHES=caches):
+            yield
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+class TestRunner(DiscoverRunner):
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._cleanup = ExitStack()
+        self._cleanup.enter_context(temporary_cache())
+
+    def teardown_test_environment(self, **kwargs):
+        self._cleanup.close()
+        super().teardown_test_environment(**kwargs)
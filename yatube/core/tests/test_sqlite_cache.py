@@ -0,0 +1,90 @@
+import multiprocessing
+import shutil
+import tempfile
+import time
+from os import path
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+
+from core.sqlite_cache import SQLiteCache
+
+
+def get_cache(location, **options):
+    return SQLiteCache(location, {'OPTIONS': options})
+
+
+def increment(location, times):
+    cache = get_cache(location)
+    for _ in range(times):
+        cache.incr('counter')
+
+
+class SQLiteCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory, ignore_errors=True)
+        self.location = path.join(directory, 'cache.sqlite3')
+        self.cache = get_cache(self.location)
+
+    def test_values_are_shared(self):
+        """Записи видны другому экземпляру кэша на том же файле."""
+        self.cache.set('key', {'value': [1, 2]})
+        self.cache.set_many({'a': 1, 'b': 2})
+        other = get_cache(self.location)
+        self.assertEqual(other.get('key'), {'value': [1, 2]})
+        self.assertEqual(
+            other.get_many(['a', 'b', 'missing']), {'a': 1, 'b': 2}
+        )
+        other.delete_many(['a', 'key'])
+        self.assertIsNone(self.cache.get('key'))
+        self.assertTrue(self.cache.has_key('b'))
+        other.clear()
+        self.assertIsNone(self.cache.get('b', None))
+
+    def test_timeouts(self):
+        """Истёкшие записи не читаются, а add их заменяет."""
+        self.cache.set('gone', 1, timeout=0)
+        self.assertFalse(self.cache.has_key('gone'))
+        self.cache.set('short', 1, timeout=0.05)
+        self.assertFalse(self.cache.add('short', 2))
+        time.sleep(0.1)
+        self.assertIsNone(self.cache.get('short'))
+        self.assertTrue(self.cache.add('short', 3))
+        self.assertEqual(self.cache.get('short'), 3)
+        self.assertTrue(self.cache.touch('short', None))
+        self.assertFalse(self.cache.touch('missing'))
+
+    def test_incr(self):
+        """incr меняет число и падает на отсутствующем ключе."""
+        self.cache.set('counter', 10)
+        self.assertEqual(self.cache.incr('counter', 5), 15)
+        self.assertEqual(self.cache.decr('counter'), 14)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+    def test_incr_is_atomic_between_processes(self):
+        """Одновременные incr из разных процессов не теряются."""
+        self.cache.set('counter', 0)
+        context = multiprocessing.get_context('spawn')
+        workers = [
+            context.Process(target=increment, args=(self.location, 50))
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        self.assertEqual(self.cache.get('counter'), 200)
+
+    @patch('core.sqlite_cache.ACCESS_RESOLUTION', 0)
+    def test_least_recently_used_are_evicted(self):
+        """Сверх MAX_ENTRIES удаляются давно не читанные записи."""
+        cache = get_cache(self.location, MAX_ENTRIES=4, CULL_FREQUENCY=2)
+        for key in 'abcd':
+            cache.set(key, key)
+        cache.get('a')
+        cache.set('e', 'e')
+        self.assertEqual(
+            cache.get_many('abcde'), {'a': 'a', 'd': 'd', 'e': 'e'}
+        )
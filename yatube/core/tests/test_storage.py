@@ -0,0 +1,40 @@
+import hashlib
+import os
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.test import SimpleTestCase
+
+from core.storage import ContentAddressedStorage
+
+
+class ContentAddressedStorageTests(SimpleTestCase):
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.root, ignore_errors=True)
+        self.storage = ContentAddressedStorage(location=self.root)
+
+    def test_name_is_sharded_content_hash(self):
+        """Имя файла — хэш содержимого во вложенных каталогах."""
+        digest = hashlib.sha256(b'content').hexdigest()
+        name = self.storage.save('posts/Photo.JPG', ContentFile(b'content'))
+        self.assertEqual(
+            name, f'posts/{digest[:2]}/{digest[2:4]}/{digest}.jpg'
+        )
+        with self.storage.open(name) as stored:
+            self.assertEqual(stored.read(), b'content')
+
+    def test_same_content_is_stored_once(self):
+        """Повторная загрузка того же содержимого не создаёт копию."""
+        first = self.storage.save('posts/a.gif', ContentFile(b'same'))
+        second = self.storage.save('posts/b.gif', ContentFile(b'same'))
+        other = self.storage.save('posts/c.gif', ContentFile(b'other'))
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, other)
+        files = [
+            filename
+            for _, _, filenames in os.walk(self.root)
+            for filename in filenames
+        ]
+        self.assertEqual(len(files), 2)
@@ -0,0 +1,111 @@
+import time
+import warnings
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.cache.backends.base import CacheKeyWarning
+from django.template import Context, Template
+from django.test import TestCase
+
+from core import cache_tags
+from core.tiered_cache import TieredCache
+
+TEMPLATE = Template(
+    '{% load tagged_cache %}'
+    "{% tagged_cache fragment page tags 'feed'|cache_tag:page 'all' %}"
+    '{{ value }}'
+    '{% endtagged_cache %}'
+)
+
+
+class TaggedCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def render(self, value, page=1):
+        return TEMPLATE.render(Context({'value': value, 'page': page}))
+
+    def test_fragment_cached_until_tag_invalidated(self):
+        """Фрагмент берётся из кэша до сброса своего тега."""
+        self.assertEqual(self.render('first'), 'first')
+        self.assertEqual(self.render('second'), 'first')
+        cache_tags.invalidate('feed:1')
+        self.assertEqual(self.render('third'), 'third')
+
+    def test_invalidation_is_limited_to_tag(self):
+        """Сброс тега не трогает фрагменты с другими тегами."""
+        self.render('page 1', page=1)
+        self.render('page 2', page=2)
+        cache_tags.invalidate('feed:2')
+        self.assertEqual(self.render('new', page=1), 'page 1')
+        self.assertEqual(self.render('new', page=2), 'new')
+        cache_tags.invalidate('all')
+        self.assertEqual(self.render('newer', page=1), 'newer')
+
+    def test_tag_keys_are_safe(self):
+        """Теги с пробелами и кириллицей не попадают в ключи как есть."""
+        with warnings.catch_warnings():
+            warnings.simplefilter('error', CacheKeyWarning)
+            cache_tags.invalidate('group:Тестовый слаг')
+            cache_tags.get_versions(['group:Тестовый слаг'])
+
+    def test_stale_value_served_while_recomputed(self):
+        """Пока запись пересчитывает другой процесс, отдаётся прежняя."""
+        cache_tags.get_or_set('fragment', lambda: 'first', 60, tags=['t'])
+        cache_tags.invalidate('t')
+        key = cache_tags.make_key('fragment', tags=['t'])
+        lock_key = f'lock.{cache_tags._stale_key(key)}'
+        cache.add(lock_key, True)
+        value = cache_tags.get_or_set(
+            'fragment', lambda: 'second', 60, tags=['t']
+        )
+        self.assertEqual(value, 'first')
+        cache.delete(lock_key)
+        value = cache_tags.get_or_set(
+            'fragment', lambda: 'second', 60, tags=['t']
+        )
+        self.assertEqual(value, 'second')
+        self.assertIsNone(cache.get(lock_key))
+
+    def test_expired_value_recomputed_once(self):
+        """Истёкшая запись пересчитывается, а не пропадает из кэша."""
+        cache_tags.get_or_set('fragment', lambda: 'first', 0.2)
+        time.sleep(0.25)
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return 'second'
+
+        self.assertEqual(
+            cache_tags.get_or_set('fragment', compute, 60), 'second'
+        )
+        self.assertEqual(
+            cache_tags.get_or_set('fragment', compute, 60), 'second'
+        )
+        self.assertEqual(len(calls), 1)
+
+    def test_refresh_shared_between_processes(self):
+        """Запись, обновлённую одним процессом, другой не пересчитывает."""
+        workers = [
+            TieredCache('', {'OPTIONS': {
+                'L2': 'shared', 'L1_KEY_PREFIXES': ['tagged.'],
+            }})
+            for _ in range(2)
+        ]
+        calls = []
+
+        def get(worker, value):
+            def compute():
+                calls.append(value)
+                return value
+
+            with patch.object(cache_tags, 'cache', worker):
+                return cache_tags.get_or_set('fragment', compute, 0.2)
+
+        self.assertEqual(get(workers[0], 'first'), 'first')
+        self.assertEqual(get(workers[1], 'second'), 'first')
+        time.sleep(0.25)
+        self.assertEqual(get(workers[0], 'third'), 'third')
+        get(workers[1], 'fourth')
+        self.assertEqual(calls, ['first', 'third'])
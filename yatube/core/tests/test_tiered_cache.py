@@ -0,0 +1,79 @@
+from io import StringIO
+
+from django.core.cache import caches
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.tiered_cache import TieredCache
+
+
+def get_cache(**options):
+    """Отдельный экземпляр — как кэш другого процесса сервера."""
+    return TieredCache('', {'OPTIONS': {
+        'L2': 'shared',
+        'L1_KEY_PREFIXES': ['card:'],
+        **options,
+    }})
+
+
+class TieredCacheTests(SimpleTestCase):
+    def setUp(self):
+        caches['shared'].clear()
+        self.first = get_cache()
+        self.second = get_cache()
+
+    def test_versioned_keys_are_kept_in_process(self):
+        """Ключи со штампом читаются из L2 один раз, затем из L1."""
+        self.first.set('card:1:v1', 'карточка')
+        self.assertEqual(self.second.get('card:1:v1'), 'карточка')
+        self.assertEqual(self.second.get('card:1:v1'), 'карточка')
+        caches['shared'].delete('card:1:v1')
+        self.assertEqual(self.second.get('card:1:v1'), 'карточка')
+        self.assertEqual(self.second.stats(), {
+            'l1_hits': 2,
+            'l1_misses': 1,
+            'l2_hits': 1,
+            'l2_misses': 0,
+            'l1_entries': 1,
+        })
+
+    def test_new_stamp_reaches_every_process(self):
+        """Новая версия читается всеми процессами без рассылки."""
+        self.first.set('version', 1)
+        self.first.set('card:1:v1', 'старая')
+        self.second.get('card:1:v1')
+        self.first.set_many({'version': 2, 'card:1:v2': 'новая'})
+        version = self.second.get('version')
+        self.assertEqual(version, 2)
+        self.assertEqual(self.second.get(f'card:1:v{version}'), 'новая')
+
+    def test_other_keys_are_not_kept(self):
+        """Ключи без штампа всегда читаются из L2."""
+        self.first.set('counter', 1)
+        self.assertEqual(self.second.get('counter'), 1)
+        self.first.incr('counter')
+        self.assertEqual(self.second.get('counter'), 2)
+        self.assertEqual(self.second.get_many(['counter', 'card:x']), {
+            'counter': 2
+        })
+
+    def test_l1_is_bounded(self):
+        """L1 вытесняет давно не читанные ключи."""
+        cache = get_cache(L1_MAX_ENTRIES=2)
+        cache.set_many({'card:1': 1, 'card:2': 2})
+        cache.get('card:1')
+        cache.set('card:3', 3)
+        caches['shared'].clear()
+        self.assertEqual(
+            cache.get_many(['card:1', 'card:2', 'card:3']),
+            {'card:1': 1, 'card:3': 3}
+        )
+
+    def test_stats_command(self):
+        """Команда cache_stats выводит попадания уровней."""
+        caches['default'].reset_stats()
+        caches['default'].set('post_card:1', 'карточка')
+        caches['default'].get('post_card:1')
+        out = StringIO()
+        call_command('cache_stats', reset=True, stdout=out)
+        self.assertIn('L1: попаданий 1 из 1', out.getvalue())
@@ -0,0 +1,208 @@
+"""Двухуровневый кэш: LRU в памяти процесса (L1) перед общим кэшем (L2).
+
+    CACHES = {
+        'default': {
+            'BACKEND': 'core.tiered_cache.TieredCache',
+            'OPTIONS': {
+                'L2': 'shared',
+                'L1_MAX_ENTRIES': 1000,
+                'L1_TIMEOUT': 60,
+                'L1_KEY_PREFIXES': ['tagged.', 'post_card:'],
+            },
+        },
+        'shared': {...},
+    }
+
+В L1 попадают только ключи с префиксами из L1_KEY_PREFIXES. Это ключи
+со штампом версии: фрагменты {% tagged_cache %} включают версии своих
+тегов, карточки — время изменения поста. Значение под таким ключом не
+меняется, поэтому копии в L1 разных процессов не нужно сбрасывать:
+сохранение поста меняет штамп, новый ключ в L1 не находится и читается
+из L2, а старые копии вытесняются LRU. Сами версии тегов и остальные
+ключи читаются и пишутся только в L2. L1_TIMEOUT ограничивает жизнь
+копии, если ключ всё же перезапишут.
+
+Счётчики попаданий и промахов каждого уровня копятся в процессе и не
+реже раза в STATS_FLUSH_INTERVAL секунд складываются в L2 атомарным
+incr: stats() показывает сумму по всем процессам.
+"""
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+STATS = ('l1_hits', 'l1_misses', 'l2_hits', 'l2_misses')
+
+STATS_KEY_PREFIX = 'tiered_cache_stats'
+
+STATS_FLUSH_INTERVAL = 10
+
+
+class TieredCache(BaseCache):
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l2_alias = options['L2']
+        self._l1_max_entries = options.get('L1_MAX_ENTRIES', 1000)
+        self._l1_timeout = options.get('L1_TIMEOUT', 60)
+        self._l1_prefixes = tuple(options.get('L1_KEY_PREFIXES', ()))
+        self._l1 = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = dict.fromkeys(STATS, 0)
+        self._flushed = time.monotonic()
+
+    @property
+    def l2(self):
+        return caches[self._l2_alias]
+
+    def _in_l1(self, key):
+        return key.startswith(self._l1_prefixes)
+
+    def _l1_key(self, key, version):
+        key = self.make_key(key, version=version)
+        self.validate_key(key)
+        return key
+
+    def _count(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._stats[name] += value
+            due = time.monotonic() - self._flushed > STATS_FLUSH_INTERVAL
+        if due:
+            self.flush_stats()
+
+    def _l1_get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._l1.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires <= now:
+                del self._l1[key]
+                return None
+            self._l1.move_to_end(key)
+        return pickle.loads(value)
+
+    def _l1_set(self, key, value, timeout):
+        if timeout is DEFAULT_TIMEOUT:
+            timeout = self.l2.default_timeout
+        if timeout is None or timeout > self._l1_timeout:
+            timeout = self._l1_timeout
+        if timeout <= 0:
+            self._l1_delete([key])
+            return
+        value = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._l1[key] = (time.monotonic() + timeout, value)
+            self._l1.move_to_end(key)
+            while len(self._l1) > self._l1_max_entries:
+                self._l1.popitem(last=False)
+
+    def _l1_delete(self, keys):
+        with self._lock:
+            for key in keys:
+                self._l1.pop(key, None)
+
+    def get(self, key, default=None, version=None):
+        return self.get_many([key], version=version).get(key, default)
+
+    def get_many(self, keys, version=None):
+        found = {}
+        rest = []
+        for key in keys:
+            if self._in_l1(key):
+                value = self._l1_get(self._l1_key(key, version))
+                if value is not None:
+                    found[key] = value
+                    continue
+            rest.append(key)
+        from_l2 = self.l2.get_many(rest, version=version) if rest else {}
+        for key, value in from_l2.items():
+            if self._in_l1(key):
+                self._l1_set(
+                    self._l1_key(key, version), value, DEFAULT_TIMEOUT
+                )
+        found.update(from_l2)
+        l1_keys = sum(1 for key in keys if self._in_l1(key))
+        l1_hits = len(found) - len(from_l2)
+        self._count(
+            l1_hits=l1_hits,
+            l1_misses=l1_keys - l1_hits,
+            l2_hits=len(from_l2),
+            l2_misses=len(rest) - len(from_l2),
+        )
+        return found
+
+    def has_key(self, key, version=None):
+        return self.l2.has_key(key, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        self.set_many({key: value}, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        failed = self.l2.set_many(data, timeout=timeout, version=version)
+        for key, value in data.items():
+            if self._in_l1(key) and key not in failed:
+                self._l1_set(self._l1_key(key, version), value, timeout)
+        return failed
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        added = self.l2.add(key, value, timeout=timeout, version=version)
+        if added and self._in_l1(key):
+            self._l1_set(self._l1_key(key, version), value, timeout)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.l2.touch(key, timeout=timeout, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        self._l1_delete([self._l1_key(key, version)])
+        return self.l2.incr(key, delta=delta, version=version)
+
+    def delete(self, key, version=None):
+        self.delete_many([key], version=version)
+
+    def delete_many(self, keys, version=None):
+        keys = list(keys)
+        self._l1_delete([self._l1_key(key, version) for key in keys])
+        self.l2.delete_many(keys, version=version)
+
+    def clear(self):
+        with self._lock:
+            self._l1.clear()
+        self.l2.clear()
+
+    def close(self, **kwargs):
+        self.l2.close(**kwargs)
+
+    def flush_stats(self):
+        """Складывает счётчики процесса в общие счётчики в L2."""
+        with self._lock:
+            counts, self._stats = self._stats, dict.fromkeys(STATS, 0)
+            self._flushed = time.monotonic()
+        for name, value in counts.items():
+            if not value:
+                continue
+            key = f'{STATS_KEY_PREFIX}:{name}'
+            self.l2.add(key, 0, None)
+            self.l2.incr(key, value)
+
+    def stats(self):
+        """Попадания и промахи уровней по всем процессам и размер L1."""
+        self.flush_stats()
+        keys = {f'{STATS_KEY_PREFIX}:{name}': name for name in STATS}
+        totals = self.l2.get_many(keys)
+        result = {name: totals.get(key, 0) for key, name in keys.items()}
+        result['l1_entries'] = len(self._l1)
+        return result
+
+    def reset_stats(self):
+        with self._lock:
+            self._stats = dict.fromkeys(STATS, 0)
+        self.l2.delete_many(
+            [f'{STATS_KEY_PREFIX}:{name}' for name in STATS]
+        )
@@ -0,0 +1,17 @@
+"""Настройка процессов, запущенных через spawn.
+
+Модуль не импортирует моделей: его функции вызываются до
+django.setup().
+"""
+import django
+from django.conf import settings
+
+
+def setup(caches):
+    """django.setup() в новом процессе с кэшами родителя.
+
+    Процесс заново читает настройки, а у тестов кэши подменены (см.
+    core.test_runner).
+    """
+    django.setup()
+    settings.CACHES = caches
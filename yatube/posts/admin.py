@@ -17,6 +17,12 @@ class PostAdmin(admin.ModelAdmin):
     list_filter = ('pub_date',)
     empty_value_display = '-пусто-'
 
+    def get_search_results(self, request, queryset, search_term):
+        """Поиск по text через полнотекстовый индекс вместо LIKE."""
+        if not search_term:
+            return queryset, False
+        return queryset.matching(search_term), False
+
 
 class CommentAdmin(admin.ModelAdmin):
     list_display = ('pk', 'post', 'author', 'text', 'created')
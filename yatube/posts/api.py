@@ -0,0 +1,256 @@
+"""JSON API только для чтения: посты, группы, профили и комментарии.
+
+Списки листаются курсорами `after`/`before`, как HTML-ленты, и
+отдаются вместе с курсорами соседних страниц. Параметр `fields=id,text`
+выбирает поля ответа: из базы читаются только нужные для них столбцы,
+а связанные таблицы присоединяются, только если их поля запрошены.
+Любой список стоит одного запроса; родительский объект (группа, автор,
+пост) ищется отдельно, только если страница пуста, чтобы отличить
+пустой список от несуществующего родителя.
+"""
+from functools import wraps
+
+from django.conf import settings
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_safe
+
+from .models import Comment, Group, Post, User
+from .paginator import CursorPaginator
+from .timelines import get_follow_paginator
+
+JSON_PARAMS = {'separators': (',', ':'), 'ensure_ascii': False}
+
+
+class FieldsError(ValueError):
+    pass
+
+
+def api_response(data, status=200):
+    return JsonResponse(
+        data, status=status, safe=False, json_dumps_params=JSON_PARAMS
+    )
+
+
+def api_view(view):
+    """Только GET и HEAD, ошибки — тоже в JSON."""
+    @require_safe
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            return view(request, *args, **kwargs)
+        except Http404:
+            return api_response({'detail': 'Не найдено.'}, 404)
+        except FieldsError as error:
+            return api_response({'detail': str(error)}, 400)
+    return wrapper
+
+
+class Fields:
+    """Поля ответа ресурса: имя → (столбцы, функция значения).
+
+    Столбцы keys читаются всегда: по ним строятся курсоры.
+    """
+
+    def __init__(self, fields, keys=()):
+        self.fields = fields
+        self.keys = keys
+
+    def parse(self, request):
+        raw = request.GET.get('fields')
+        if not raw:
+            return list(self.fields)
+        names = [name for name in raw.split(',') if name]
+        unknown = [name for name in names if name not in self.fields]
+        if unknown:
+            raise FieldsError(
+                f'Неизвестные поля: {", ".join(unknown)}. '
+                f'Доступны: {", ".join(self.fields)}.'
+            )
+        return names
+
+    def select(self, queryset, names):
+        """queryset, читающий только столбцы полей names."""
+        columns = {*self.keys}
+        for name in names:
+            columns.update(self.fields[name][0])
+        related = {
+            column.split('__')[0] for column in columns if '__' in column
+        }
+        # select_related() без аргументов присоединил бы все таблицы.
+        queryset = queryset.select_related(None)
+        if related:
+            queryset = queryset.select_related(*related)
+        return queryset.only(*columns)
+
+    def dump(self, obj, names):
+        return {name: self.fields[name][1](obj) for name in names}
+
+
+def _image(post):
+    if not post.image:
+        return None
+    return {
+        'url': post.image.url,
+        'width': post.image_width,
+        'height': post.image_height,
+    }
+
+
+POST_FIELDS = Fields({
+    'id': ((), lambda post: post.pk),
+    'text': (('text',), lambda post: post.text),
+    'pub_date': (('pub_date',), lambda post: post.pub_date),
+    'updated': (('updated',), lambda post: post.updated),
+    'author': (
+        ('author', 'author__username'),
+        lambda post: post.author.username,
+    ),
+    'group': (
+        ('group', 'group__slug'),
+        lambda post: post.group.slug if post.group_id else None,
+    ),
+    'image': (('image', 'image_width', 'image_height'), _image),
+    'image_placeholder': (
+        ('image_placeholder',),
+        lambda post: post.image_placeholder or None,
+    ),
+    'comments_count': (
+        ('comments_count',), lambda post: post.comments_count
+    ),
+}, keys=('pub_date',))
+
+COMMENT_FIELDS = Fields({
+    'id': ((), lambda comment: comment.pk),
+    'post': (('post',), lambda comment: comment.post_id),
+    'author': (
+        ('author', 'author__username'),
+        lambda comment: comment.author.username if comment.author else None,
+    ),
+    'text': (('text',), lambda comment: comment.text),
+    'created': (('created',), lambda comment: comment.created),
+}, keys=('created',))
+
+GROUP_FIELDS = Fields({
+    'slug': (('slug',), lambda group: group.slug),
+    'title': (('title',), lambda group: group.title),
+    'description': (('description',), lambda group: group.description),
+})
+
+
+def _stats(name):
+    return (
+        ('stats', f'stats__{name}'),
+        lambda user: getattr(getattr(user, 'stats', None), name, 0),
+    )
+
+
+PROFILE_FIELDS = Fields({
+    'username': (('username',), lambda user: user.username),
+    'name': (
+        ('first_name', 'last_name'),
+        lambda user: user.get_full_name(),
+    ),
+    'posts_count': _stats('posts_count'),
+    'followers_count': _stats('followers_count'),
+    'following_count': _stats('following_count'),
+})
+
+
+def _page(request, paginator, resource, names):
+    page = paginator.get_page(request.GET)
+    return page, {
+        'results': [resource.dump(obj, names) for obj in page],
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    }
+
+
+def _post_list(request, posts, exists=None):
+    """Страница постов; exists() — есть ли родитель у пустой страницы."""
+    names = POST_FIELDS.parse(request)
+    paginator = CursorPaginator(
+        POST_FIELDS.select(posts, names), settings.NUMBER_OF_POSTS
+    )
+    page, data = _page(request, paginator, POST_FIELDS, names)
+    if not page.object_list and exists is not None and not exists():
+        raise Http404
+    return api_response(data)
+
+
+@api_view
+def posts(request):
+    return _post_list(request, Post.objects.all())
+
+
+@api_view
+def post(request, post_id):
+    names = POST_FIELDS.parse(request)
+    obj = get_object_or_404(
+        POST_FIELDS.select(Post.objects.all(), names), pk=post_id
+    )
+    return api_response(POST_FIELDS.dump(obj, names))
+
+
+@api_view
+def post_comments(request, post_id):
+    names = COMMENT_FIELDS.parse(request)
+    comments = COMMENT_FIELDS.select(
+        Comment.objects.filter(post_id=post_id), names
+    )
+    paginator = CursorPaginator(
+        comments, settings.NUMBER_OF_POSTS, keys=('created', 'pk')
+    )
+    page, data = _page(request, paginator, COMMENT_FIELDS, names)
+    if (not page.object_list
+            and not Post.objects.filter(pk=post_id).exists()):
+        raise Http404
+    return api_response(data)
+
+
+@api_view
+def group(request, slug):
+    names = GROUP_FIELDS.parse(request)
+    obj = get_object_or_404(
+        GROUP_FIELDS.select(Group.objects.all(), names), slug=slug
+    )
+    return api_response(GROUP_FIELDS.dump(obj, names))
+
+
+@api_view
+def group_posts(request, slug):
+    return _post_list(
+        request,
+        Post.objects.filter(group__slug=slug),
+        Group.objects.filter(slug=slug).exists,
+    )
+
+
+@api_view
+def profile(request, username):
+    names = PROFILE_FIELDS.parse(request)
+    obj = get_object_or_404(
+        PROFILE_FIELDS.select(User.objects.all(), names), username=username
+    )
+    return api_response(PROFILE_FIELDS.dump(obj, names))
+
+
+@api_view
+def profile_posts(request, username):
+    return _post_list(
+        request,
+        Post.objects.filter(author__username=username),
+        User.objects.filter(username=username).exists,
+    )
+
+
+@api_view
+def follow_posts(request):
+    if not request.user.is_authenticated:
+        return api_response({'detail': 'Требуется вход.'}, 401)
+    names = POST_FIELDS.parse(request)
+    paginator = get_follow_paginator(request.user, settings.NUMBER_OF_POSTS)
+    # Движок ленты читает посты из object_list.
+    paginator.object_list = POST_FIELDS.select(paginator.object_list, names)
+    _, data = _page(request, paginator, POST_FIELDS, names)
+    return api_response(data)
@@ -0,0 +1,386 @@
+"""Массовая загрузка групп, постов, комментариев и подписок.
+
+Записи читаются потоком (NDJSON в формате export_posts или CSV) и
+пишутся пачками через bulk_create, по транзакции на пачку. Пользователи
+и группы ищутся по имени и slug в словарях в памяти: каждое новое имя
+запрашивается один раз на пачку, а отсутствующие пользователи
+создаются без пароля. Посты получают id из диапазона, занятого в
+счётчике AUTOINCREMENT (см. reserve_ids), чтобы комментарии находили их
+по исходным id без чтения обратно. Соответствие исходных id новым
+(ids) можно сохранить между запусками: CSV загружается по таблице за
+запуск. Подписки-дубликаты пропускаются ограничением unique_follow.
+
+bulk_create не посылает сигналов, поэтому после загрузки finish()
+пересчитывает счётчики затронутых записей, дополняет ленты подписок
+постами загруженных авторов и подписок, считает заглушки картинок и
+сбрасывает кэш затронутых страниц. Поиск обновляют триггеры базы.
+"""
+import csv
+import json
+from contextlib import contextmanager
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import cache_tags
+
+from . import counters, timelines
+from .models import Comment, Follow, Group, Post
+from .signals import uses_timeline
+
+User = get_user_model()
+
+BATCH_SIZE = 1000
+
+MODEL_TABLES = {
+    'posts.group': 'groups',
+    'posts.post': 'posts',
+    'posts.comment': 'comments',
+    'posts.follow': 'follows',
+}
+
+TABLES = list(MODEL_TABLES.values())
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_ndjson(file):
+    """(таблица, исходный pk, поля) из строк в формате export_posts."""
+    for line in file:
+        if not line.strip():
+            continue
+        record = json.loads(line)
+        table = MODEL_TABLES.get(record.get('model'))
+        if table is None:
+            raise RowError(f'Неизвестная модель: {record.get("model")}')
+        yield table, record.get('pk'), record['fields']
+
+
+def read_csv(file, table):
+    """(таблица, исходный pk, поля) из CSV с заголовком.
+
+    Столбцы называются как поля записей export_posts, исходный pk —
+    столбец id, пустые ячейки означают отсутствие значения.
+    """
+    for row in csv.DictReader(file):
+        fields = {name: value or None for name, value in row.items()}
+        yield table, fields.pop('id', None), fields
+
+
+def reserve_ids(model, count):
+    """Первый из count идущих подряд id для новых записей model.
+
+    Счётчик AUTOINCREMENT таблицы в sqlite_sequence сдвигается на count
+    в текущей транзакции: id удалённых записей не достаются новым, а
+    записи, созданные сайтом во время загрузки, получат id после
+    диапазона.
+    """
+    table = model._meta.db_table
+    quote = connection.ops.quote_name
+    last = (
+        f'SELECT coalesce(max({quote(model._meta.pk.column)}), 0) '
+        f'FROM {quote(table)}'
+    )
+    with connection.cursor() as cursor:
+        # UPDATE сразу берёт замок записи, так что между чтением
+        # счётчика и его сдвигом никто не вставит строку.
+        cursor.execute(
+            f'UPDATE sqlite_sequence SET seq = max(seq, ({last})) + %s '
+            f'WHERE name = %s',
+            [count, table]
+        )
+        if not cursor.rowcount:
+            cursor.execute(
+                f'INSERT INTO sqlite_sequence (name, seq) '
+                f'SELECT %s, ({last}) + %s',
+                [table, count]
+            )
+        cursor.execute(
+            'SELECT seq FROM sqlite_sequence WHERE name = %s', [table]
+        )
+        return cursor.fetchone()[0] - count + 1
+
+
+def _username(value):
+    # Natural key пользователя в выгрузке — список [username].
+    if isinstance(value, (list, tuple)):
+        return value[0]
+    return value
+
+
+def _datetime(value, default):
+    if not value:
+        return default
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise RowError(f'Неверная дата: {value}')
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+@contextmanager
+def original_timestamps():
+    """Отключает auto_now и auto_now_add, чтобы сохранить даты записей."""
+    fields = [
+        Post._meta.get_field('pub_date'),
+        Post._meta.get_field('updated'),
+        Comment._meta.get_field('created'),
+    ]
+    saved = [(field.auto_now, field.auto_now_add) for field in fields]
+    for field in fields:
+        field.auto_now = field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field, (auto_now, auto_now_add) in zip(fields, saved):
+            field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+class Importer:
+    """Пишет записи пачками.
+
+    ids — новые id групп и постов по исходным pk (строкам):
+    {'groups': {...}, 'posts': {...}}. Пропущенный пост записан с id
+    None, и его комментарии тоже пропускаются.
+    """
+
+    def __init__(self, batch_size=BATCH_SIZE, ids=None):
+        self.batch_size = batch_size
+        self.users = {}
+        self.groups = {}
+        self.ids = {'groups': {}, 'posts': {}}
+        for table, mapping in (ids or {}).items():
+            self.ids[table].update(mapping)
+        self.counts = dict.fromkeys(TABLES, 0)
+        self.skipped = dict.fromkeys(TABLES, 0)
+        self.authors = set()
+        self.post_authors = set()
+        self.touched_groups = set()
+        self.commented_posts = set()
+        self.follows = set()
+        self.images = set()
+        self.has_images = False
+        self.table = None
+        self.rows = []
+
+    def add(self, table, pk, fields):
+        if table != self.table or len(self.rows) >= self.batch_size:
+            self.flush()
+            self.table = table
+        self.rows.append((pk, fields))
+
+    def flush(self):
+        if not self.rows:
+            return
+        rows, self.rows = self.rows, []
+        with transaction.atomic(), original_timestamps():
+            getattr(self, f'write_{self.table}')(rows)
+
+    def resolve_users(self, usernames):
+        missing = {name for name in usernames if name} - set(self.users)
+        if not missing:
+            return
+        self.users.update(User.objects.filter(
+            username__in=missing
+        ).values_list('username', 'pk'))
+        missing -= set(self.users)
+        if missing:
+            User.objects.bulk_create(
+                [
+                    User(username=name, password=make_password(None))
+                    for name in missing
+                ],
+                ignore_conflicts=True
+            )
+            self.users.update(User.objects.filter(
+                username__in=missing
+            ).values_list('username', 'pk'))
+
+    def resolve_groups(self, slugs):
+        missing = set(slugs) - set(self.groups)
+        if missing:
+            self.groups.update(Group.objects.filter(
+                slug__in=missing
+            ).values_list('slug', 'pk'))
+
+    def group_id(self, value):
+        """id группы по исходному pk из выгрузки или по slug."""
+        if value is None:
+            return None
+        if isinstance(value, int):
+            return self.ids['groups'].get(str(value))
+        return self.groups.get(value)
+
+    def write_groups(self, rows):
+        Group.objects.bulk_create(
+            [
+                Group(
+                    slug=fields['slug'],
+                    title=fields['title'],
+                    description=fields.get('description') or '',
+                )
+                for _, fields in rows
+            ],
+            ignore_conflicts=True
+        )
+        self.resolve_groups(fields['slug'] for _, fields in rows)
+        for pk, fields in rows:
+            if pk is not None:
+                self.ids['groups'][str(pk)] = self.groups[fields['slug']]
+        self.counts['groups'] += len(rows)
+
+    def write_posts(self, rows):
+        self.resolve_users(_username(fields['author']) for _, fields in rows)
+        self.resolve_groups(
+            fields['group'] for _, fields in rows
+            if isinstance(fields.get('group'), str)
+        )
+        now = timezone.now()
+        posts = []
+        sources = []
+        for pk, fields in rows:
+            group_id = self.group_id(fields.get('group'))
+            if fields.get('group') is not None and group_id is None:
+                if pk is not None:
+                    self.ids['posts'][str(pk)] = None
+                self.skipped['posts'] += 1
+                continue
+            pub_date = _datetime(fields.get('pub_date'), now)
+            post = Post(
+                text=fields['text'],
+                author_id=self.users[_username(fields['author'])],
+                group_id=group_id,
+                pub_date=pub_date,
+                updated=_datetime(fields.get('updated'), pub_date),
+                image=fields.get('image') or '',
+                image_width=fields.get('image_width'),
+                image_height=fields.get('image_height'),
+                image_placeholder=fields.get('image_placeholder') or '',
+            )
+            self.authors.add(post.author_id)
+            self.post_authors.add(post.author_id)
+            if group_id is not None:
+                self.touched_groups.add(group_id)
+            if post.image:
+                self.images.add(post.image.name)
+            if post.image and not post.image_placeholder:
+                self.has_images = True
+            posts.append(post)
+            sources.append(pk)
+        if not posts:
+            return
+        first_id = reserve_ids(Post, len(posts))
+        for post_id, (post, pk) in enumerate(zip(posts, sources), first_id):
+            post.pk = post_id
+            if pk is not None:
+                self.ids['posts'][str(pk)] = post_id
+        Post.objects.bulk_create(posts)
+        self.counts['posts'] += len(posts)
+
+    def write_comments(self, rows):
+        self.resolve_users(
+            _username(fields.get('author')) for _, fields in rows
+        )
+        now = timezone.now()
+        comments = []
+        for _, fields in rows:
+            source = str(fields['post'])
+            if source not in self.ids['posts']:
+                raise RowError(
+                    f'Пост {source} не загружен: комментарии загружаются '
+                    f'в одном запуске с постами или с --id-map.'
+                )
+            post_id = self.ids['posts'][source]
+            if post_id is None:
+                self.skipped['comments'] += 1
+                continue
+            author = _username(fields.get('author'))
+            comments.append(Comment(
+                post_id=post_id,
+                author_id=self.users[author] if author else None,
+                text=fields['text'],
+                created=_datetime(fields.get('created'), now),
+            ))
+        Comment.objects.bulk_create(comments)
+        self.commented_posts.update(comment.post_id for comment in comments)
+        self.counts['comments'] += len(comments)
+
+    def write_follows(self, rows):
+        pairs = [
+            (_username(fields['user']), _username(fields['author']))
+            for _, fields in rows
+        ]
+        self.resolve_users(name for pair in pairs for name in pair)
+        ids = {
+            (self.users[user], self.users[author])
+            for user, author in pairs if user != author
+        }
+        self.skipped['follows'] += len(pairs) - len(ids)
+        # Уже существующие подписки ищутся по индексу unique_follow:
+        # ignore_conflicts не сообщает, какие строки отброшены.
+        existing = set(Follow.objects.filter(
+            user_id__in={user_id for user_id, _ in ids},
+            author_id__in={author_id for _, author_id in ids},
+        ).values_list('user_id', 'author_id')) & ids
+        new = ids - existing
+        Follow.objects.bulk_create(
+            [
+                Follow(user_id=user_id, author_id=author_id)
+                for user_id, author_id in new
+            ],
+            ignore_conflicts=True
+        )
+        for pair in new:
+            self.authors.update(pair)
+        self.follows.update(new)
+        self.counts['follows'] += len(new)
+        self.skipped['follows'] += len(existing)
+
+    def finish(self):
+        """Делает для записанных пачек то, что делали бы сигналы."""
+        if not any(self.counts.values()):
+            return
+        counters.recount(
+            users=self.authors,
+            groups=self.touched_groups,
+            posts=self.commented_posts,
+            images=self.images,
+        )
+        if uses_timeline():
+            self.backfill_timelines()
+        if self.has_images:
+            call_command('describe_post_images', stdout=StringIO())
+        for author_id in self.authors:
+            timelines.forget_recent_posts(author_id)
+        slugs = Group.objects.filter(
+            pk__in=self.touched_groups
+        ).values_list('slug', flat=True)
+        cache_tags.invalidate(
+            'feed:index',
+            *(f'author:{pk}' for pk in self.authors),
+            *(f'group:{slug}' for slug in slugs),
+            *(f'post:{pk}' for pk in self.commented_posts),
+        )
+
+    def backfill_timelines(self):
+        """Раскладывает в ленты посты загруженных авторов и подписок.
+
+        Записи лент не удаляются, а дополняются: повторы отбрасывает
+        уникальный ключ TimelineEntry.
+        """
+        pairs = set(self.follows)
+        authors = list(self.post_authors)
+        for start in range(0, len(authors), counters.CHUNK_SIZE):
+            pairs.update(Follow.objects.filter(
+                author_id__in=authors[start:start + counters.CHUNK_SIZE]
+            ).values_list('user_id', 'author_id'))
+        for user_id, author_id in pairs:
+            timelines.backfill(user_id, author_id)
@@ -0,0 +1,102 @@
+"""Денормализованные счётчики постов, комментариев, подписок и ссылок
+на файлы картинок.
+
+Счётчики меняются сигналами (см. signals.py) атомарным UPDATE ... F(),
+а команда recount_counters пересчитывает их целиком. Массовая загрузка
+(см. bulk_import.py) пересчитывает только затронутые записи.
+"""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Group, MediaFile, Post, UserStats
+
+User = get_user_model()
+
+# Сколько pk подставлять в один запрос при пересчёте части счётчиков.
+CHUNK_SIZE = 500
+
+
+def bump(model, pk, field, delta):
+    """Меняет счётчик field записи pk на delta.
+
+    Отсутствующие записи UserStats и MediaFile создаются только при
+    увеличении: уменьшения приходят и при каскадном удалении.
+    """
+    if pk is None:
+        return
+    rows = model.objects.filter(pk=pk)
+    if delta < 0:
+        rows = rows.filter(**{f'{field}__gte': -delta})
+    updated = rows.update(**{field: F(field) + delta})
+    if not updated and delta > 0 and model in (UserStats, MediaFile):
+        model.objects.get_or_create(pk=pk)
+        bump(model, pk, field, delta)
+
+
+def _count(queryset, key):
+    return Coalesce(
+        Subquery(
+            queryset.filter(**{key: OuterRef('pk')}).order_by().values(
+                key
+            ).annotate(total=Count('pk')).values('total'),
+            output_field=IntegerField()
+        ),
+        0
+    )
+
+
+def _scopes(queryset, values, field='pk'):
+    """queryset целиком (values is None) или частями по значениям
+    field из values.
+    """
+    if values is None:
+        yield queryset
+        return
+    values = list(values)
+    for start in range(0, len(values), CHUNK_SIZE):
+        yield queryset.filter(
+            **{f'{field}__in': values[start:start + CHUNK_SIZE]}
+        )
+
+
+def recount(users=None, groups=None, posts=None, images=None):
+    """Пересчитывает счётчики массовыми UPDATE.
+
+    Без аргументов пересчитываются все счётчики, иначе — только у
+    пользователей, групп и постов с pk из users, groups, posts и у
+    картинок с именами из images.
+    """
+    for scope in _scopes(User.objects.filter(stats__isnull=True), users):
+        UserStats.objects.bulk_create(
+            (
+                UserStats(user_id=pk)
+                for pk in scope.values_list('pk', flat=True).iterator()
+            ),
+            ignore_conflicts=True
+        )
+    for scope in _scopes(UserStats.objects.all(), users):
+        scope.update(
+            posts_count=_count(Post.objects, 'author'),
+            followers_count=_count(Follow.objects, 'author'),
+            following_count=_count(Follow.objects, 'user'),
+        )
+    for scope in _scopes(Group.objects.all(), groups):
+        scope.update(posts_count=_count(Post.objects, 'group'))
+    for scope in _scopes(Post.objects.all(), posts):
+        scope.update(comments_count=_count(Comment.objects, 'post'))
+    unknown_images = Post.objects.exclude(image='').exclude(
+        image__in=MediaFile.objects.values('pk')
+    ).order_by()
+    for scope in _scopes(unknown_images, images, 'image'):
+        MediaFile.objects.bulk_create(
+            (
+                MediaFile(name=name)
+                for name in scope.values_list(
+                    'image', flat=True
+                ).distinct().iterator()
+            ),
+            ignore_conflicts=True
+        )
+    for scope in _scopes(MediaFile.objects.all(), images):
+        scope.update(refs=_count(Post.objects, 'image'))
@@ -0,0 +1,141 @@
+"""Выгрузка таблиц приложения в NDJSON.
+
+Каждая строка — одна запись в формате dumpdata:
+{"model": "posts.post", "pk": 1, "fields": {...}}, пользователи в
+ссылках записаны именем (natural key), поэтому выгрузку можно загрузить
+в базу с другими id пользователей. Таблицы читаются пачками по ключу
+(keyset), так что память не зависит от их размера, а ключ последней
+выгруженной записи каждой таблицы (high-water mark) позволяет следующей
+выгрузке взять только новые записи. Посты упорядочены по (updated, pk),
+поэтому в следующую выгрузку попадают и отредактированные посты.
+Остальные таблицы идут по pk: комментарии и подписки не редактируются,
+а правки групп в админке повторно не выгружаются.
+"""
+import json
+
+from django.core import serializers
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+from .models import Comment, Follow, Group, Post
+
+BATCH_SIZE = 1000
+
+
+class Table:
+    """Выгружаемая таблица и поля, по которым её можно отфильтровать."""
+
+    def __init__(self, model, related=(), keys=('pk',), **lookups):
+        self.model = model
+        self.related = related
+        self.keys = keys
+        self.lookups = lookups
+
+    def queryset(self, filters):
+        """Записи под фильтрами; неприменимые к таблице фильтры не
+        ограничивают её.
+        """
+        queryset = self.model.objects.select_related(*self.related)
+        for name, value in filters.items():
+            lookup = self.lookups.get(name)
+            if lookup is not None and value is not None:
+                queryset = queryset.filter(**{lookup: value})
+        return queryset.order_by(*self.keys)
+
+    def mark(self, obj):
+        """Ключ записи obj для файла состояния."""
+        if self.keys == ('pk',):
+            return obj.pk
+        return [obj.updated.isoformat(), obj.pk]
+
+    def after(self, queryset, mark):
+        """Записи queryset после ключа mark."""
+        if self.keys == ('pk',):
+            return queryset.filter(pk__gt=mark)
+        if not isinstance(mark, list):
+            # Отметка прежнего формата (только pk): таблица выгружается
+            # заново, иначе изменения до неё потеряются.
+            return queryset
+        updated, pk = parse_datetime(mark[0]), mark[1]
+        # updated__gte даёт базе начать с ключа, а не с начала индекса.
+        return queryset.filter(
+            Q(updated__gt=updated) | Q(pk__gt=pk), updated__gte=updated
+        )
+
+
+# Порядок таблиц годится для загрузки: ссылки идут на уже загруженное.
+TABLES = {
+    'groups': Table(Group, group='slug'),
+    'posts': Table(
+        Post,
+        related=['author'],
+        keys=('updated', 'pk'),
+        since='pub_date__gte',
+        until='pub_date__lt',
+        author='author__username',
+        group='group__slug',
+    ),
+    'comments': Table(
+        Comment,
+        related=['author'],
+        since='created__gte',
+        until='created__lt',
+        author='post__author__username',
+        group='post__group__slug',
+    ),
+    'follows': Table(
+        Follow, related=['user', 'author'], author='author__username'
+    ),
+}
+
+
+def records(table, queryset, mark=None, batch_size=BATCH_SIZE):
+    """(запись в формате dumpdata, её ключ) из queryset таблицы
+    table, пачками по batch_size.
+    """
+    while True:
+        if mark is not None:
+            batch = list(table.after(queryset, mark)[:batch_size])
+        else:
+            batch = list(queryset[:batch_size])
+        if not batch:
+            return
+        yield from zip(
+            serializers.serialize(
+                'python', batch, use_natural_foreign_keys=True
+            ),
+            map(table.mark, batch),
+        )
+        mark = table.mark(batch[-1])
+
+
+def dump(record):
+    return json.dumps(
+        record,
+        cls=DjangoJSONEncoder,
+        ensure_ascii=False,
+        separators=(',', ':'),
+    ) + '\n'
+
+
+def export(out, tables=TABLES, filters=None, marks=None,
+           batch_size=BATCH_SIZE):
+    """Пишет таблицы tables в файл out построчно.
+
+    marks — ключи последних уже выгруженных записей по именам таблиц
+    (см. Table.mark). Возвращает число записей и новые marks.
+    """
+    filters = filters or {}
+    marks = dict(marks or {})
+    counts = {}
+    for name in tables:
+        counts[name] = 0
+        table = TABLES[name]
+        for record, mark in records(
+            table, table.queryset(filters), marks.get(name), batch_size
+        ):
+            out.write(dump(record))
+            counts[name] += 1
+            marks[name] = mark
+    return counts, marks
@@ -0,0 +1,206 @@
+"""Ленты постов в форматах RSS, Atom и JSON Feed.
+
+Лента не собирается в памяти: посты читаются окнами по FEED_WINDOW
+штук по индексу ленты (как страницы CursorPaginator), и каждый пост
+сразу записывается в ответ StreamingHttpResponse.
+"""
+import io
+import json
+
+from django.conf import settings
+from django.db.models import Max
+from django.http import StreamingHttpResponse
+from django.urls import reverse
+from django.utils import feedgenerator
+from django.utils.html import linebreaks
+from django.utils.text import Truncator
+from django.utils.xmlutils import SimplerXMLGenerator
+
+from .paginator import CursorPaginator
+
+TITLE_WORDS = 10
+
+
+class FeedFormatConverter:
+    """Формат ленты в адресе: rss, atom или json."""
+
+    regex = 'rss|atom|json'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return value
+
+
+class StreamingXMLFeed:
+    """Примесь к лентам feedgenerator: запись по одному элементу.
+
+    Классы с примесью задают start_root() и end_root(): открытие и
+    закрытие корневых элементов ленты.
+    """
+
+    item_element = 'item'
+
+    def latest_post_date(self):
+        # Посты ещё не прочитаны, когда пишется заголовок ленты.
+        return self.feed['updated'] or super().latest_post_date()
+
+    def stream(self, items):
+        """Текст ленты по частям; items — словари для add_item()."""
+        buffer = io.StringIO()
+        handler = SimplerXMLGenerator(buffer, 'utf-8')
+
+        def flush():
+            text = buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+            return text
+
+        handler.startDocument()
+        self.start_root(handler)
+        self.add_root_elements(handler)
+        yield flush()
+        for fields in items:
+            self.add_item(**fields)
+            item = self.items.pop()
+            handler.startElement(
+                self.item_element, self.item_attributes(item)
+            )
+            self.add_item_elements(handler, item)
+            handler.endElement(self.item_element)
+            yield flush()
+        self.end_root(handler)
+        yield flush()
+
+
+class RssFeed(StreamingXMLFeed, feedgenerator.Rss201rev2Feed):
+    def start_root(self, handler):
+        handler.startElement('rss', self.rss_attributes())
+        handler.startElement('channel', self.root_attributes())
+
+    def end_root(self, handler):
+        self.endChannelElement(handler)
+        handler.endElement('rss')
+
+
+class AtomFeed(StreamingXMLFeed, feedgenerator.Atom1Feed):
+    item_element = 'entry'
+
+    def start_root(self, handler):
+        handler.startElement('feed', self.root_attributes())
+
+    def end_root(self, handler):
+        handler.endElement('feed')
+
+
+class JSONFeed(feedgenerator.SyndicationFeed):
+    """Лента в формате JSON Feed 1.1."""
+
+    content_type = 'application/feed+json; charset=utf-8'
+
+    def item_json(self, item):
+        data = {
+            'id': item['unique_id'],
+            'url': item['link'],
+            'title': item['title'],
+            'content_html': item['description'],
+            'date_published': item['pubdate'].isoformat(),
+            'date_modified': item['updateddate'].isoformat(),
+            'authors': [
+                {'name': item['author_name'], 'url': item['author_link']}
+            ],
+            'tags': list(item['categories']),
+        }
+        if item.get('image'):
+            data['image'] = item['image']
+        return json.dumps(data, ensure_ascii=False)
+
+    def stream(self, items):
+        head = json.dumps({
+            'version': 'https://jsonfeed.org/version/1.1',
+            'title': self.feed['title'],
+            'home_page_url': self.feed['link'],
+            'feed_url': self.feed['feed_url'],
+            'description': self.feed['description'],
+            'language': self.feed['language'],
+        }, ensure_ascii=False)
+        # Открываем объект заголовка обратно, чтобы дописать посты.
+        yield head[:-1] + ', "items": ['
+        separator = ''
+        for fields in items:
+            self.add_item(**fields)
+            yield separator + self.item_json(self.items.pop())
+            separator = ', '
+        yield ']}'
+
+
+FORMATS = {
+    'rss': RssFeed,
+    'atom': AtomFeed,
+    'json': JSONFeed,
+}
+
+
+def windows(posts, size, window):
+    """Первые size постов по убыванию даты, запросами по window штук."""
+    paginator = CursorPaginator(posts, window)
+    cursor = None
+    while size > 0:
+        rows = paginator.seek(cursor)[:min(window, size)]
+        yield from rows
+        if len(rows) < window:
+            return
+        size -= window
+        cursor = (rows[-1].pub_date, rows[-1].pk)
+
+
+def latest_update(posts, size):
+    """Время последнего изменения среди первых size постов."""
+    newest = posts.order_by('-pub_date', '-pk').values('pk')[:size]
+    return posts.model.objects.filter(
+        pk__in=newest
+    ).aggregate(updated=Max('updated'))['updated']
+
+
+def item_fields(request, post):
+    link = request.build_absolute_uri(
+        reverse('posts:post_detail', args=[post.pk])
+    )
+    author = post.author
+    fields = {
+        'title': Truncator(post.text).words(TITLE_WORDS),
+        'link': link,
+        'unique_id': link,
+        'description': linebreaks(post.text, autoescape=True),
+        'author_name': author.get_full_name() or author.username,
+        'author_link': request.build_absolute_uri(
+            reverse('posts:profile', args=[author.username])
+        ),
+        'pubdate': post.pub_date,
+        'updateddate': post.updated,
+        'categories': [post.group.slug] if post.group_id else [],
+    }
+    if post.image:
+        fields['image'] = request.build_absolute_uri(post.image.url)
+    return fields
+
+
+def feed_response(request, feed_format, posts, title, link, description):
+    """Потоковый ответ с лентой последних постов из posts."""
+    size = settings.FEED_ITEMS
+    feed = FORMATS[feed_format](
+        title=title,
+        link=request.build_absolute_uri(link),
+        description=description,
+        language=settings.LANGUAGE_CODE,
+        feed_url=request.build_absolute_uri(),
+        updated=latest_update(posts, size),
+    )
+    items = (
+        item_fields(request, post)
+        for post in windows(posts, size, settings.FEED_WINDOW)
+    )
+    return StreamingHttpResponse(
+        feed.stream(items), content_type=feed.content_type
+    )
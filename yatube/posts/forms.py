@@ -1,5 +1,7 @@
 from django import forms
+from django.core.files.uploadedfile import UploadedFile
 
+from .images import normalize
 from .models import Comment, Post
 
 
@@ -12,6 +14,12 @@ class PostForm(forms.ModelForm):
             'group': 'Группа, к которой будет относиться пост',
         }
 
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if isinstance(image, UploadedFile):
+            return normalize(image)
+        return image
+
 
 class CommentForm(forms.ModelForm):
     class Meta:
@@ -0,0 +1,159 @@
+"""Обработка картинок постов при загрузке.
+
+Картинка проверяется на размер файла и число пикселей (по заголовку,
+до декодирования), поворачивается по EXIF, уменьшается до
+POST_IMAGE_MAX_SIDE по большей стороне и пережимается без метаданных:
+EXIF, XMP, комментарии и встроенные превью не сохраняются.
+
+describe() считает для сохранённой в посте картинки её размеры и
+заглушку: размытую копию в несколько сотен байт, которая показывается,
+пока грузится сама картинка.
+"""
+import base64
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.template.defaultfilters import filesizeformat
+from PIL import Image, ImageFilter, ImageOps
+
+ORIENTATION = 0x0112
+
+# Форматы, которые остаются как есть; остальные (MPO камер, TIFF, BMP
+# и т. п.) сохраняются в JPEG, а с прозрачностью — в PNG.
+EXTENSIONS = {
+    'JPEG': ('.jpg', '.jpeg'),
+    'PNG': ('.png',),
+    'GIF': ('.gif',),
+    'WEBP': ('.webp',),
+}
+
+
+def check_limits(upload, image):
+    """Отклоняет слишком большие файл и картинку.
+
+    image — картинка, открытая по заголовку, без декодирования.
+    """
+    if upload.size > settings.POST_IMAGE_MAX_UPLOAD_SIZE:
+        raise ValidationError(
+            'Файл больше %(limit)s.',
+            code='file_too_large',
+            params={
+                'limit': filesizeformat(settings.POST_IMAGE_MAX_UPLOAD_SIZE)
+            },
+        )
+    width, height = image.size
+    if width * height > settings.POST_IMAGE_MAX_PIXELS:
+        raise ValidationError(
+            'Картинка больше %(limit)d мегапикселей.',
+            code='too_many_pixels',
+            params={'limit': settings.POST_IMAGE_MAX_PIXELS // 10 ** 6},
+        )
+
+
+def has_alpha(image):
+    return image.mode in ('RGBA', 'LA', 'PA') or (
+        'transparency' in image.info
+    )
+
+
+def get_format(image):
+    if image.format in EXTENSIONS:
+        return image.format
+    return 'PNG' if has_alpha(image) else 'JPEG'
+
+
+def get_name(name, image_format):
+    root, extension = os.path.splitext(os.path.basename(name))
+    if extension.lower() in EXTENSIONS[image_format]:
+        return root + extension
+    return root + EXTENSIONS[image_format][0]
+
+
+def encode(image, image_format):
+    options = {}
+    if image_format == 'JPEG':
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        options = {
+            'quality': settings.POST_IMAGE_QUALITY,
+            'optimize': True,
+            'progressive': True,
+        }
+    elif image_format == 'WEBP':
+        options = {'quality': settings.POST_IMAGE_QUALITY}
+    elif image_format in ('PNG', 'GIF'):
+        options = {'optimize': True}
+        if 'transparency' in image.info:
+            options['transparency'] = image.info['transparency']
+    # Цветовой профиль не метаданные: без него поедут цвета.
+    if image.info.get('icc_profile'):
+        options['icc_profile'] = image.info['icc_profile']
+    buffer = BytesIO()
+    image.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def normalize(upload):
+    """Возвращает обработанную картинку upload для сохранения в Post.
+
+    Анимированные картинки сохраняются как загружены: пересборка
+    кадров не стоит выигрыша.
+    """
+    upload.seek(0)
+    with Image.open(upload) as image:
+        check_limits(upload, image)
+        if getattr(image, 'is_animated', False):
+            upload.seek(0)
+            return upload
+        image_format = get_format(image)
+        max_side = settings.POST_IMAGE_MAX_SIDE
+        # JPEG декодируется сразу в уменьшенном масштабе.
+        image.draft('RGB', (max_side, max_side))
+        oriented = ImageOps.exif_transpose(image)
+        if max(oriented.size) > max_side:
+            if oriented.mode == 'P':
+                # Палитру при уменьшении сглаживаем в полном цвете.
+                oriented = oriented.convert(
+                    'RGBA' if has_alpha(oriented) else 'RGB'
+                )
+            oriented.thumbnail((max_side, max_side), Image.LANCZOS)
+        oriented.info = {}
+        if 'icc_profile' in image.info:
+            oriented.info['icc_profile'] = image.info['icc_profile']
+        if 'transparency' in image.info and oriented.mode == image.mode:
+            oriented.info['transparency'] = image.info['transparency']
+        content = encode(oriented, image_format)
+    return ContentFile(content, name=get_name(upload.name, image_format))
+
+
+def describe(file):
+    """Размеры картинки file и её заглушка в виде data: URI.
+
+    Заглушка кадрируется, как миниатюры, под POST_IMAGE_ASPECT.
+    """
+    file.seek(0)
+    with Image.open(file) as image:
+        width, height = image.size
+        if image.getexif().get(ORIENTATION, 1) > 4:
+            width, height = height, width
+        aspect_width, aspect_height = settings.POST_IMAGE_ASPECT
+        size = (
+            settings.POST_IMAGE_PLACEHOLDER_WIDTH,
+            round(
+                settings.POST_IMAGE_PLACEHOLDER_WIDTH
+                * aspect_height / aspect_width
+            ),
+        )
+        image.draft('RGB', (size[0] * 4, size[1] * 4))
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if has_alpha(image) else 'RGB')
+        placeholder = ImageOps.fit(image, size, Image.BILINEAR).filter(
+            ImageFilter.GaussianBlur(1)
+        )
+    buffer = BytesIO()
+    placeholder.save(buffer, 'WEBP', quality=40)
+    data = base64.b64encode(buffer.getvalue()).decode()
+    return width, height, f'data:image/webp;base64,{data}'
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import media_gc
+
+
+class Command(BaseCommand):
+    help = (
+        'Удаляет картинки без постов, лишние и давно не показанные '
+        'миниатюры и записи kvstore о пропавших файлах.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только посчитать, ничего не удаляя.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=media_gc.BATCH_SIZE,
+            help='Сколько файлов или записей обрабатывать за раз.',
+        )
+        parser.add_argument(
+            '--max-age',
+            type=int,
+            default=settings.THUMBNAIL_MAX_AGE // (60 * 60 * 24),
+            help='Через сколько дней без показов удалять миниатюру.',
+        )
+
+    def handle(self, *args, **options):
+        max_age = options['max_age'] * 60 * 60 * 24
+        # Адрес миниатюры живёт в кэше карточки, а та — в кэше
+        # страницы: раньше миниатюра может понадобиться без показа.
+        cached = settings.POST_CARD_CACHE_TIMEOUT + settings.PAGE_CACHE_TIMEOUT
+        if max_age <= cached:
+            raise CommandError(
+                f'--max-age должен быть больше {cached} секунд: столько '
+                'адрес миниатюры может отдаваться из кэша страниц.'
+            )
+        counts = media_gc.collect(
+            max_age=max_age,
+            batch_size=options['batch_size'],
+            dry_run=options['dry_run'],
+        )
+        verb = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb}: картинок без постов — {counts["images"]}, '
+            f'лишних миниатюр — {counts["orphaned_thumbnails"]}, '
+            f'давно не показанных миниатюр — {counts["expired_thumbnails"]}, '
+            f'записей kvstore — {counts["kvstore_entries"]}'
+        ))
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import images
+from posts.models import Post
+
+BATCH_SIZE = 200
+
+
+class Command(BaseCommand):
+    help = (
+        'Считает размеры и размытые заглушки картинок постов, '
+        'загруженных до их появления.'
+    )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').filter(
+            image_placeholder=''
+        ).only('image').order_by('pk')
+        last_pk = 0
+        described = failed = 0
+        while True:
+            batch = list(posts.filter(pk__gt=last_pk)[:BATCH_SIZE])
+            if not batch:
+                break
+            last_pk = batch[-1].pk
+            ready = []
+            for post in batch:
+                try:
+                    (
+                        post.image_width,
+                        post.image_height,
+                        post.image_placeholder,
+                    ) = images.describe(post.image)
+                except Exception as error:
+                    failed += 1
+                    self.stderr.write(f'{post.image}: {error!r}')
+                    continue
+                finally:
+                    post.image.close()
+                # Новое время изменения сменит ключ кэша карточки.
+                post.updated = timezone.now()
+                ready.append(post)
+            Post.objects.bulk_update(ready, [
+                'image_width', 'image_height', 'image_placeholder', 'updated'
+            ])
+            described += len(ready)
+        self.stdout.write(self.style.SUCCESS(
+            f'Заглушек посчитано: {described}, не удалось: {failed}'
+        ))
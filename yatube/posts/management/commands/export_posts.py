@@ -0,0 +1,108 @@
+import gzip
+import json
+import os
+from datetime import date, datetime, time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from posts import export
+
+
+def start_of(day):
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает группы, посты, комментарии и подписки в NDJSON '
+        '(по записи dumpdata в строке), не читая таблицы в память.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--tables',
+            nargs='+',
+            choices=list(export.TABLES),
+            default=list(export.TABLES),
+            help='Какие таблицы выгружать; по умолчанию все.',
+        )
+        parser.add_argument(
+            '-o', '--output',
+            help='Файл выгрузки; без него — стандартный вывод. '
+                 'Файл *.gz сжимается gzip.',
+        )
+        parser.add_argument(
+            '--since',
+            type=date.fromisoformat,
+            help='Посты и комментарии не раньше этой даты (ГГГГ-ММ-ДД).',
+        )
+        parser.add_argument(
+            '--until',
+            type=date.fromisoformat,
+            help='Посты и комментарии не позже этой даты (ГГГГ-ММ-ДД).',
+        )
+        parser.add_argument(
+            '--author',
+            help='Только посты автора, комментарии к ним и подписки '
+                 'на него.',
+        )
+        parser.add_argument(
+            '--group',
+            help='Только группа, её посты и комментарии к ним.',
+        )
+        parser.add_argument(
+            '--state',
+            help='JSON-файл с ключами последних выгруженных записей: '
+                 'выгрузка берёт только новые и изменённые посты и '
+                 'новые записи других таблиц и обновляет его.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=export.BATCH_SIZE,
+            help='Сколько записей читать за запрос.',
+        )
+
+    def handle(self, *args, **options):
+        filters = {
+            'since': options['since'] and start_of(options['since']),
+            'until': options['until'] and start_of(
+                options['until'] + timedelta(days=1)
+            ),
+            'author': options['author'],
+            'group': options['group'],
+        }
+        marks = {}
+        state = options['state']
+        if state and os.path.exists(state):
+            with open(state) as file:
+                marks = json.load(file)
+        output = options['output']
+        if output is None:
+            out = self.stdout
+            # OutputWrapper иначе добавит перевод строки к каждой записи.
+            out.ending = ''
+        elif output.endswith('.gz'):
+            out = gzip.open(output, 'wt', encoding='utf-8')
+        else:
+            out = open(output, 'w', encoding='utf-8')
+        try:
+            counts, marks = export.export(
+                out,
+                tables=options['tables'],
+                filters=filters,
+                marks=marks,
+                batch_size=options['batch_size'],
+            )
+        finally:
+            if output is not None:
+                out.close()
+        if state:
+            # Отметки меняются только после полной выгрузки.
+            with open(state + '.tmp', 'w') as file:
+                json.dump(marks, file)
+            os.replace(state + '.tmp', state)
+        self.stderr.write(self.style.SUCCESS('Выгружено: ' + ', '.join(
+            f'{name} — {count}' for name, count in counts.items()
+        )))
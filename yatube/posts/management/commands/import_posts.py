@@ -0,0 +1,119 @@
+import gzip
+import json
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from posts import bulk_import
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает группы, посты, комментарии и подписки из NDJSON '
+        '(формат export_posts) или CSV пачками bulk_create, сохраняя '
+        'исходные даты.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            help='Файл загрузки, *.gz распаковывается; - — стандартный ввод.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=['ndjson', 'csv'],
+            help='Формат файла; по умолчанию по расширению.',
+        )
+        parser.add_argument(
+            '--table',
+            choices=bulk_import.TABLES,
+            help='Таблица, в которую загружается CSV.',
+        )
+        parser.add_argument(
+            '--id-map',
+            help='JSON-файл с новыми id групп и постов по исходным: '
+                 'загрузка берёт из него id прошлых запусков и '
+                 'дописывает свои, так CSV комментариев находит посты '
+                 'из CSV, загруженного раньше.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=bulk_import.BATCH_SIZE,
+            help='Сколько записей писать за одну транзакцию.',
+        )
+
+    def open(self, path):
+        if path == '-':
+            return sys.stdin
+        if path.endswith('.gz'):
+            return gzip.open(path, 'rt', encoding='utf-8', newline='')
+        return open(path, encoding='utf-8', newline='')
+
+    def save_ids(self, path, ids):
+        with open(path + '.tmp', 'w') as file:
+            json.dump(ids, file)
+        os.replace(path + '.tmp', path)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        name = path[:-len('.gz')] if path.endswith('.gz') else path
+        file_format = options['format'] or (
+            'csv' if name.endswith('.csv') else 'ndjson'
+        )
+        if file_format == 'csv' and not options['table']:
+            raise CommandError('Для CSV нужно указать --table.')
+        id_map = options['id_map']
+        ids = None
+        if id_map and os.path.exists(id_map):
+            with open(id_map) as file:
+                ids = json.load(file)
+        importer = bulk_import.Importer(options['batch_size'], ids)
+        started = time.monotonic()
+        file = self.open(path)
+        try:
+            if file_format == 'csv':
+                rows = bulk_import.read_csv(file, options['table'])
+            else:
+                rows = bulk_import.read_ndjson(file)
+            number = 0
+            try:
+                for number, (table, pk, fields) in enumerate(rows, 1):
+                    importer.add(table, pk, fields)
+                importer.flush()
+            except (bulk_import.RowError, KeyError, ValueError) as error:
+                raise CommandError(
+                    f'Загрузка остановлена после {number} записей: '
+                    f'{error!r}. Пачки до ошибки сохранены.'
+                )
+            finally:
+                # id сохранённых пачек записываются, даже если
+                # finish() не справится.
+                if id_map:
+                    self.save_ids(id_map, importer.ids)
+                # Сохранённым пачкам нужны счётчики, ленты и сброс кэша.
+                importer.finish()
+        finally:
+            if file is not sys.stdin:
+                file.close()
+        elapsed = time.monotonic() - started
+        total = sum(importer.counts.values())
+        self.stdout.write(self.style.SUCCESS(
+            'Загружено: ' + ', '.join(
+                f'{table} — {count}'
+                for table, count in importer.counts.items() if count
+            ) + f'. Всего {total} за {elapsed:.1f} с, '
+            f'{total / max(elapsed, 1e-9):.0f} записей/с.'
+        ))
+        skipped = {
+            table: count
+            for table, count in importer.skipped.items() if count
+        }
+        if skipped:
+            self.stdout.write(self.style.WARNING(
+                'Пропущено: ' + ', '.join(
+                    f'{table} — {count}' for table, count in skipped.items()
+                )
+            ))
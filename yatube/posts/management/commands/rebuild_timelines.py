@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from posts import timelines
+from posts.models import Follow, TimelineEntry
+
+
+class Command(BaseCommand):
+    help = (
+        'Заново заполняет материализованные ленты подписок, '
+        'например после переключения FOLLOW_FEED_ENGINE на timeline.'
+    )
+
+    def handle(self, *args, **options):
+        TimelineEntry.objects.all().delete()
+        follows = Follow.objects.values_list('user_id', 'author_id')
+        for user_id, author_id in follows.iterator():
+            timelines.backfill(user_id, author_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Записей в лентах: {TimelineEntry.objects.count()}'
+        ))
@@ -0,0 +1,163 @@
+"""Сборка мусора в медиафайлах и миниатюрах.
+
+Картинки постов и миниатюры обходятся по каталогам, а записи kvstore
+sorl-thumbnail — по ключу, пачками по batch_size: ни дерево файлов,
+ни kvstore целиком в память не читаются. Удаляются:
+
+- картинки, на которые не ссылается ни один пост;
+- миниатюры без записи в kvstore (их картинку удалили или её
+  хранилище сменилось) и миниатюры, которые не показывали дольше
+  max_age (см. thumbnails.touch) — нужные нарисуются заново;
+- записи kvstore, файлов которых больше нет.
+
+Файлы моложе MEDIA_GC_GRACE не трогаются: картинку могли сохранить, а
+пост с ней — ещё нет.
+"""
+import posixpath
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.utils import timezone
+from sorl.thumbnail import default
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile, deserialize_image_file
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore
+
+from .models import MediaFile, Post
+from .thumbnails import source_file
+
+BATCH_SIZE = 500
+
+
+def walk(storage, path):
+    """Имена файлов в каталоге path хранилища storage и глубже."""
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield posixpath.join(path, name)
+    for directory in directories:
+        yield from walk(storage, posixpath.join(path, directory))
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _forget(keys):
+    """Удаляет записи kvstore о файлах с ключами keys."""
+    raw_keys = [
+        add_prefix(key, identity)
+        for key in keys
+        for identity in ('image', 'thumbnails')
+    ]
+    KVStore.objects.filter(key__in=raw_keys).delete()
+    default.kvstore.cache.delete_many(raw_keys)
+
+
+def collect_images(cutoff, batch_size, dry_run):
+    """Удаляет картинки без постов вместе с их миниатюрами."""
+    field = Post._meta.get_field('image')
+    storage = field.storage
+    deleted = 0
+    for batch in batched(walk(storage, field.upload_to.rstrip('/')),
+                         batch_size):
+        live = set(Post.objects.filter(image__in=batch).order_by(
+        ).values_list('image', flat=True))
+        orphans = [
+            name for name in batch
+            if name not in live and storage.get_modified_time(name) < cutoff
+        ]
+        deleted += len(orphans)
+        if dry_run or not orphans:
+            continue
+        for name in orphans:
+            default.kvstore.delete(ImageFile(source_file(name)))
+            storage.delete(name)
+        MediaFile.objects.filter(name__in=orphans).delete()
+    return deleted
+
+
+def collect_thumbnails(cutoff, expire_before, batch_size, dry_run):
+    """Удаляет миниатюры без записей kvstore и давно не показанные.
+
+    Возвращает число тех и других.
+    """
+    storage = default.storage
+    orphaned = expired = 0
+    prefix = thumbnail_settings.THUMBNAIL_PREFIX.rstrip('/')
+    for batch in batched(walk(storage, prefix), batch_size):
+        keys = {ImageFile(name, storage).key: name for name in batch}
+        known = {
+            key[len(add_prefix('')):]
+            for key in KVStore.objects.filter(
+                key__in=[add_prefix(key) for key in keys]
+            ).values_list('key', flat=True)
+        }
+        stale = {}
+        for key, name in keys.items():
+            modified = storage.get_modified_time(name)
+            if key not in known and modified < cutoff:
+                orphaned += 1
+                stale[key] = name
+            elif key in known and modified < expire_before:
+                expired += 1
+                stale[key] = name
+        if dry_run or not stale:
+            continue
+        _forget(stale)
+        for name in stale.values():
+            storage.delete(name)
+    return orphaned, expired
+
+
+def collect_kvstore(batch_size, dry_run):
+    """Удаляет записи kvstore о файлах, которых больше нет."""
+    prefix = add_prefix('')
+    last_key = ''
+    deleted = 0
+    while True:
+        rows = list(KVStore.objects.filter(
+            key__startswith=prefix, key__gt=last_key
+        ).order_by('key').values_list('key', 'value')[:batch_size])
+        if not rows:
+            return deleted
+        last_key = rows[-1][0]
+        missing = [
+            key[len(prefix):]
+            for key, value in rows
+            if not deserialize_image_file(value).exists()
+        ]
+        deleted += len(missing)
+        if missing and not dry_run:
+            _forget(missing)
+
+
+def collect(max_age=None, batch_size=BATCH_SIZE, dry_run=False):
+    """Собирает мусор; возвращает число удалённых файлов и записей.
+
+    При dry_run ничего не удаляет, а только считает.
+    """
+    now = timezone.now()
+    cutoff = now - timedelta(seconds=settings.MEDIA_GC_GRACE)
+    expire_before = now - timedelta(
+        seconds=max_age or settings.THUMBNAIL_MAX_AGE
+    )
+    images = collect_images(cutoff, batch_size, dry_run)
+    orphaned, expired = collect_thumbnails(
+        cutoff, expire_before, batch_size, dry_run
+    )
+    entries = collect_kvstore(batch_size, dry_run)
+    return {
+        'images': images,
+        'orphaned_thumbnails': orphaned,
+        'expired_thumbnails': expired,
+        'kvstore_entries': entries,
+    }
@@ -0,0 +1,61 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:20
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+import django.db.models.deletion
+
+
+def fill_timelines(apps, schema_editor):
+    Follow = apps.get_model('posts', 'Follow')
+    Post = apps.get_model('posts', 'Post')
+    TimelineEntry = apps.get_model('posts', 'TimelineEntry')
+    pull_authors = Follow.objects.values('author').annotate(
+        followers=Count('id')
+    ).filter(
+        followers__gt=settings.FEED_FANOUT_LIMIT
+    ).values_list('author', flat=True)
+    follows = Follow.objects.exclude(
+        author__in=list(pull_authors)
+    ).values_list('user_id', 'author_id')
+    for user_id, author_id in follows.iterator():
+        posts = Post.objects.filter(
+            author_id=author_id
+        ).values_list('pk', 'pub_date')
+        TimelineEntry.objects.bulk_create(
+            (
+                TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+                for pk, pub_date in posts.iterator()
+            ),
+            batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('posts', '0010_post_feed_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TimelineEntry',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pub_date', models.DateTimeField(verbose_name='Дата публикации')),
+                ('post', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline_entries', to='posts.Post', verbose_name='Пост')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='timeline', to=settings.AUTH_USER_MODEL, verbose_name='Читатель')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='timelineentry',
+            index=models.Index(fields=['user', '-pub_date', '-post'], name='timeline_user_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='timelineentry',
+            constraint=models.UniqueConstraint(fields=('user', 'post'), name='unique_timeline_entry'),
+        ),
+        migrations.RunPython(fill_timelines, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:51
+
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def count_image_refs(apps, schema_editor):
+    """Заводит записи уже загруженных картинок со старыми именами."""
+    MediaFile = apps.get_model('posts', 'MediaFile')
+    Post = apps.get_model('posts', 'Post')
+    images = Post.objects.exclude(image='').order_by().values(
+        'image'
+    ).annotate(total=Count('pk'))
+    MediaFile.objects.bulk_create(
+        (
+            MediaFile(name=image['image'], refs=image['total'])
+            for image in images.iterator()
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0015_post_search'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaFile',
+            fields=[
+                ('name', models.CharField(max_length=255, primary_key=True, serialize=False, verbose_name='Имя файла')),
+                ('refs', models.PositiveIntegerField(default=0, verbose_name='Число ссылок')),
+                ('created', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+            ],
+        ),
+        # Хранилище не меняет схему, а пересоздание таблицы в SQLite
+        # удалило бы триггеры полнотекстового индекса.
+        migrations.SeparateDatabaseAndState(state_operations=[
+            migrations.AlterField(
+                model_name='post',
+                name='image',
+                field=models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+            ),
+        ]),
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['image'], name='post_image_idx'),
+        ),
+        migrations.RunPython(count_image_refs, migrations.RunPython.noop),
+    ]
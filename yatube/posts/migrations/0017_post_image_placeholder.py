@@ -0,0 +1,33 @@
+# Generated by Django 2.2.16 on 2026-10-17 04:56
+
+from django.db import migrations, models
+
+from posts.search import restore_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0016_media_files'),
+    ]
+
+    # SQLite пересоздаёт posts_post и теряет триггеры поиска.
+    operations = [
+        migrations.RunPython(migrations.RunPython.noop, restore_triggers),
+        migrations.AddField(
+            model_name='post',
+            name='image_height',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Высота картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_placeholder',
+            field=models.TextField(blank=True, editable=False, verbose_name='Заглушка картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_width',
+            field=models.PositiveIntegerField(editable=False, null=True, verbose_name='Ширина картинки'),
+        ),
+        migrations.RunPython(restore_triggers, migrations.RunPython.noop),
+    ]
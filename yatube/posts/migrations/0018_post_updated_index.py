@@ -0,0 +1,17 @@
+# Generated by Django 2.2.16 on 2026-10-17 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0017_post_image_placeholder'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['updated', 'id'], name='post_updated_idx'),
+        ),
+    ]
@@ -1,5 +1,10 @@
 from django.contrib.auth import get_user_model
 from django.db import models
+from django.db.models.expressions import RawSQL
+
+from core.storage import ContentAddressedStorage
+
+from .search import SEARCH_TABLE, fts_query
 
 User = get_user_model()
 
@@ -8,11 +13,69 @@ class Group(models.Model):
     title = models.CharField(max_length=200, verbose_name='Имя группы')
     slug = models.SlugField(unique=True, verbose_name='Адрес')
     description = models.TextField(verbose_name='Описание')
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число постов'
+    )
 
     def __str__(self):
         return self.title[:15]
 
 
+class PostQuerySet(models.QuerySet):
+    def for_feed(self):
+        """Посты для карточек ленты: автор и группа в том же запросе,
+        только отображаемые в карточке поля.
+        """
+        return self.select_related('author', 'group').only(
+            'text',
+            'pub_date',
+            'updated',
+            'image',
+            'image_width',
+            'image_height',
+            'image_placeholder',
+            'author__username',
+            'author__first_name',
+            'author__last_name',
+            'group__slug',
+        )
+
+    def matching(self, query):
+        """Посты, текст которых подходит под строку поиска query."""
+        match = fts_query(query)
+        if not match:
+            return self.none()
+        return self.extra(
+            where=[
+                f'{self.model._meta.db_table}.id IN (SELECT rowid '
+                f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s)'
+            ],
+            params=[match],
+        )
+
+    def search(self, query):
+        """Результаты поиска с оценкой score: чем больше, тем лучше.
+
+        Сниппеты считаются отдельно, только для показываемой страницы
+        (см. search.add_snippets): snippet() для всех совпадений
+        обходится дороже самого поиска.
+        """
+        match = fts_query(query)
+        posts = self.extra(
+            tables=[SEARCH_TABLE],
+            where=[
+                f'{SEARCH_TABLE}.rowid = {self.model._meta.db_table}.id',
+                f'{SEARCH_TABLE} MATCH %s',
+            ],
+            params=[match],
+        ).annotate(score=RawSQL(
+            f'-bm25({SEARCH_TABLE})', (), output_field=models.FloatField()
+        ))
+        return posts if match else posts.none()
+
+
 class Post(models.Model):
     text = models.TextField(verbose_name='Текст')
     pub_date = models.DateTimeField(
@@ -37,14 +100,57 @@ class Post(models.Model):
     image = models.ImageField(
         'Картинка',
         upload_to='posts/',
+        storage=ContentAddressedStorage(),
         blank=True
     )
+    image_width = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Ширина картинки'
+    )
+    image_height = models.PositiveIntegerField(
+        null=True,
+        editable=False,
+        verbose_name='Высота картинки'
+    )
+    image_placeholder = models.TextField(
+        blank=True,
+        editable=False,
+        verbose_name='Заглушка картинки'
+    )
+    comments_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Число комментариев'
+    )
+    updated = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Дата изменения'
+    )
+
+    objects = PostQuerySet.as_manager()
 
     def __str__(self):
         return self.text[:15]
 
     class Meta:
         ordering = ['-pub_date']
+        indexes = [
+            models.Index(
+                fields=['-pub_date', '-id'],
+                name='post_feed_idx'
+            ),
+            models.Index(
+                fields=['author', '-pub_date', '-id'],
+                name='post_author_feed_idx'
+            ),
+            models.Index(
+                fields=['group', '-pub_date', '-id'],
+                name='post_group_feed_idx'
+            ),
+            models.Index(fields=['image'], name='post_image_idx'),
+            models.Index(fields=['updated', 'id'], name='post_updated_idx'),
+        ]
 
 
 class Comment(models.Model):
@@ -70,6 +176,15 @@ class Comment(models.Model):
     def __str__(self):
         return self.text[:15]
 
+    class Meta:
+        ordering = ['created']
+        indexes = [
+            models.Index(
+                fields=['post', 'created'],
+                name='comment_post_idx'
+            ),
+        ]
+
 
 class Follow(models.Model):
     user = models.ForeignKey(
@@ -84,3 +199,91 @@ class Follow(models.Model):
         related_name='following',
         verbose_name='Автор'
     )
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'author'],
+                name='unique_follow'
+            ),
+        ]
+
+
+class UserStats(models.Model):
+    """Счётчики пользователя, поддерживаемые сигналами.
+
+    Запись создаётся при первом увеличении счётчика, поэтому её
+    отсутствие означает нулевые счётчики.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Пользователь'
+    )
+    posts_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число постов'
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписчиков'
+    )
+    following_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число подписок'
+    )
+
+
+class MediaFile(models.Model):
+    """Файл картинки и число постов, которые на него ссылаются.
+
+    Одинаковые картинки хранятся одним файлом (см. core.storage),
+    поэтому файл без ссылок можно удалить, только если счётчик
+    поддерживается сигналами и пересчитывается recount_counters.
+    """
+    name = models.CharField(
+        max_length=255,
+        primary_key=True,
+        verbose_name='Имя файла'
+    )
+    refs = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Число ссылок'
+    )
+    created = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Дата создания'
+    )
+
+
+class TimelineEntry(models.Model):
+    """Запись материализованной ленты подписок пользователя."""
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='timeline',
+        verbose_name='Читатель'
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name='timeline_entries',
+        verbose_name='Пост'
+    )
+    pub_date = models.DateTimeField(verbose_name='Дата публикации')
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['user', '-pub_date', '-post'],
+                name='timeline_user_idx'
+            ),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'post'],
+                name='unique_timeline_entry'
+            ),
+        ]
@@ -0,0 +1,126 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id).
+
+    Вместо номера страницы принимает непрозрачные курсоры `after` и
+    `before`, поэтому не выполняет ни OFFSET, ни COUNT: любая страница
+    ленты стоит одного запроса по индексу.
+    """
+
+    def __init__(self, object_list, per_page, keys=('pub_date', 'pk')):
+        super().__init__(object_list, per_page)
+        self.keys = keys
+
+    @staticmethod
+    def dump_value(value):
+        return value.isoformat()
+
+    @staticmethod
+    def load_value(raw):
+        return parse_datetime(raw)
+
+    @classmethod
+    def encode_cursor(cls, value, ident):
+        raw = f'{cls.dump_value(value)}|{ident}'.encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+    @classmethod
+    def decode_cursor(cls, token):
+        if not token:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            value, ident = raw.decode().split('|')
+            value = cls.load_value(value)
+            ident = int(ident)
+        except (binascii.Error, UnicodeDecodeError, ValueError):
+            return None
+        if value is None:
+            return None
+        return value, ident
+
+    def cursor_for(self, obj):
+        value_key, ident_key = self.keys
+        if ident_key == 'pk':
+            ident_key = obj._meta.pk.attname
+        return self.encode_cursor(
+            getattr(obj, value_key), getattr(obj, ident_key)
+        )
+
+    def seek(self, cursor, newer=False):
+        """Возвращает до per_page + 1 объектов за курсором.
+
+        При newer=True объекты идут от старых к новым, иначе наоборот.
+        """
+        return list(self.seek_queryset(
+            self.object_list, self.keys, cursor, newer
+        ))
+
+    def seek_queryset(self, object_list, keys, cursor, newer=False):
+        value_key, ident_key = keys
+        if cursor is not None:
+            value, ident = cursor
+            lookup = 'gt' if newer else 'lt'
+            # Первое условие задаёт диапазон по индексу, второе
+            # отсекает уже показанные записи с той же датой.
+            object_list = object_list.filter(
+                Q(**{f'{value_key}__{lookup}e': value}),
+                Q(**{f'{value_key}__{lookup}': value})
+                | Q(**{f'{ident_key}__{lookup}': ident}),
+            )
+        if newer:
+            ordering = (value_key, ident_key)
+        else:
+            ordering = (f'-{value_key}', f'-{ident_key}')
+        return object_list.order_by(*ordering)[:self.per_page + 1]
+
+    def get_page(self, params):
+        """Возвращает страницу по GET-параметрам `after`/`before`.
+
+        Неверный курсор, как и в Paginator.get_page, ведёт на первую
+        страницу.
+        """
+        after = self.decode_cursor(params.get('after'))
+        before = self.decode_cursor(params.get('before'))
+        if before is not None and after is None:
+            rows = self.seek(before, newer=True)
+            if len(rows) > self.per_page:
+                rows = rows[:self.per_page][::-1]
+                position = 'b' + params['before']
+                return self._get_cursor_page(rows, True, True, position)
+        rows = self.seek(after)
+        has_next = len(rows) > self.per_page
+        position = 'a' + params['after'] if after is not None else ''
+        return self._get_cursor_page(
+            rows[:self.per_page], after is not None, has_next, position
+        )
+
+    def _get_cursor_page(self, rows, has_previous, has_next, position):
+        page = Page(rows, None, self)
+        # Позиция в ленте: пригодна как ключ кэша страницы.
+        page.cursor = position
+        page.previous_cursor = None
+        page.next_cursor = None
+        if rows and has_previous:
+            page.previous_cursor = self.cursor_for(rows[0])
+        if rows and has_next:
+            page.next_cursor = self.cursor_for(rows[-1])
+        return page
+
+
+class SearchPaginator(CursorPaginator):
+    """Постраничный вывод результатов поиска по ключу (score, id)."""
+
+    def __init__(self, object_list, per_page, keys=('score', 'pk')):
+        super().__init__(object_list, per_page, keys)
+
+    # repr() числа с плавающей точкой читается float() без потерь.
+    dump_value = staticmethod(repr)
+    load_value = staticmethod(float)
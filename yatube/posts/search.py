@@ -0,0 +1,105 @@
+"""Полнотекстовый поиск по постам на SQLite FTS5.
+
+Индекс posts_post_fts хранит только токены текста (external content:
+сам текст читается из posts_post). Триггеры из миграции 0015 держат
+его в согласии с posts_post при любых INSERT, UPDATE и DELETE, в том
+числе при bulk_create и QuerySet.update. Команда rebuild_search_index
+пересобирает индекс целиком.
+
+Миграции, после которых SQLite пересоздаёт таблицу posts_post (AddField,
+RemoveField, AlterField), теряют триггеры вместе со старой таблицей и
+восстанавливают их через restore_triggers.
+"""
+import re
+
+from django.db import connection
+
+SEARCH_TABLE = 'posts_post_fts'
+
+# Границы подсветки в сниппете: символы из Private Use Area не
+# встречаются в текстах, поэтому сниппет можно экранировать целиком,
+# а затем заменить их на теги.
+MARK_START = '\ue000'
+MARK_END = '\ue001'
+
+SNIPPET_TOKENS = 24
+
+WORD = re.compile(r'\w+')
+
+TRIGGERS_SQL = [
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_insert
+    AFTER INSERT ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_delete
+    AFTER DELETE ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS {SEARCH_TABLE}_update
+    AFTER UPDATE OF text ON posts_post BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, text)
+        VALUES ('delete', old.id, old.text);
+        INSERT INTO {SEARCH_TABLE}(rowid, text) VALUES (new.id, new.text);
+    END
+    """,
+]
+
+
+def fts_query(text):
+    """Переводит строку поиска в запрос MATCH.
+
+    Каждое слово берётся в кавычки (операторы FTS5 в тексте
+    пользователя не работают) и ищется по префиксу; слова
+    объединяются через AND.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(text))
+
+
+def add_snippets(posts, query):
+    """Проставляет постам атрибут snippet: фрагмент текста вокруг
+    найденных слов с границами подсветки MARK_START и MARK_END.
+    """
+    posts = list(posts)
+    match = fts_query(query)
+    if not posts or not match:
+        return
+    ids = [post.pk for post in posts]
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rowid, snippet({SEARCH_TABLE}, 0, %s, %s, %s, %s) '
+            f'FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s '
+            f'AND rowid IN ({", ".join(["%s"] * len(ids))})',
+            [MARK_START, MARK_END, '…', SNIPPET_TOKENS, match, *ids]
+        )
+        snippets = dict(cursor.fetchall())
+    for post in posts:
+        post.snippet = snippets.get(post.pk, '')
+
+
+def rebuild():
+    """Пересобирает индекс по текущему содержимому posts_post."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"
+        )
+        cursor.execute(
+            f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('optimize')"
+        )
+
+
+def restore_triggers(apps, schema_editor):
+    """Операция RunPython: заново создаёт триггеры индекса.
+
+    Пересоздание таблицы копирует строки с их id, поэтому сам индекс
+    остаётся верным.
+    """
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for sql in TRIGGERS_SQL:
+        schema_editor.execute(sql)
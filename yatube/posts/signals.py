@@ -0,0 +1,164 @@
+import logging
+
+from django.conf import settings
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from core import cache_tags
+
+from . import images, timelines
+from .counters import bump
+from .models import Comment, Follow, Group, MediaFile, Post, UserStats
+
+logger = logging.getLogger(__name__)
+
+
+def uses_timeline():
+    return settings.FOLLOW_FEED_ENGINE == 'timeline'
+
+
+@receiver(pre_save, sender=Post)
+def remember_saved_post(sender, instance, **kwargs):
+    instance._saved_group_id = None
+    instance._saved_image = None
+    if instance._state.adding:
+        return
+    saved = Post.objects.filter(pk=instance.pk).values_list(
+        'group_id', 'image'
+    ).first()
+    if saved is not None:
+        instance._saved_group_id, instance._saved_image = saved
+
+
+@receiver(pre_save, sender=Post)
+def describe_post_image(sender, instance, **kwargs):
+    """Считает размеры и заглушку картинки, когда та меняется."""
+    image = instance.image
+    if (image.name or '') == (instance._saved_image or ''):
+        return
+    instance.image_width = instance.image_height = None
+    instance.image_placeholder = ''
+    if not image:
+        return
+    try:
+        (
+            instance.image_width,
+            instance.image_height,
+            instance.image_placeholder,
+        ) = images.describe(image)
+    except Exception as error:
+        # Картинка без заглушки показывается как раньше.
+        logger.warning('Не удалось прочитать картинку %s: %r', image, error)
+    finally:
+        if image._committed:
+            image.close()
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, **kwargs):
+    if created:
+        bump(UserStats, instance.author_id, 'posts_count', 1)
+        bump(Group, instance.group_id, 'posts_count', 1)
+    elif instance._saved_group_id != instance.group_id:
+        bump(Group, instance._saved_group_id, 'posts_count', -1)
+        bump(Group, instance.group_id, 'posts_count', 1)
+    image = instance.image.name or None
+    saved_image = instance._saved_image or None
+    if image != saved_image:
+        bump(MediaFile, saved_image, 'refs', -1)
+        bump(MediaFile, image, 'refs', 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    bump(UserStats, instance.author_id, 'posts_count', -1)
+    bump(Group, instance.group_id, 'posts_count', -1)
+    bump(MediaFile, instance.image.name or None, 'refs', -1)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, **kwargs):
+    if created:
+        bump(Post, instance.post_id, 'comments_count', 1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    bump(Post, instance.post_id, 'comments_count', -1)
+
+
+@receiver(post_save, sender=Follow)
+def count_saved_follow(sender, instance, created, **kwargs):
+    if created:
+        bump(UserStats, instance.author_id, 'followers_count', 1)
+        bump(UserStats, instance.user_id, 'following_count', 1)
+
+
+@receiver(post_delete, sender=Follow)
+def count_deleted_follow(sender, instance, **kwargs):
+    bump(UserStats, instance.author_id, 'followers_count', -1)
+    bump(UserStats, instance.user_id, 'following_count', -1)
+
+
+@receiver(post_save, sender=Post)
+def fanout_new_post(sender, instance, created, **kwargs):
+    if created:
+        timelines.forget_recent_posts(instance.author_id)
+        if uses_timeline():
+            timelines.fanout_post(instance)
+
+
+@receiver(post_delete, sender=Post)
+def forget_deleted_post(sender, instance, **kwargs):
+    timelines.forget_recent_posts(instance.author_id)
+
+
+@receiver(post_save, sender=Follow)
+def backfill_timeline(sender, instance, created, **kwargs):
+    if created and uses_timeline():
+        timelines.backfill(instance.user_id, instance.author_id)
+
+
+@receiver(post_delete, sender=Follow)
+def prune_timeline(sender, instance, **kwargs):
+    timelines.prune(instance.user_id, instance.author_id)
+
+
+def _group_tags(*group_ids):
+    slugs = Group.objects.filter(
+        pk__in=[pk for pk in group_ids if pk is not None]
+    ).values_list('slug', flat=True)
+    return [f'group:{slug}' for slug in slugs]
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    cache_tags.invalidate(
+        'feed:index',
+        f'post:{instance.pk}',
+        f'author:{instance.author_id}',
+        *_group_tags(
+            instance.group_id, getattr(instance, '_saved_group_id', None)
+        )
+    )
+
+
+@receiver(post_save, sender=Group)
+@receiver(post_delete, sender=Group)
+def invalidate_group_pages(sender, instance, **kwargs):
+    cache_tags.invalidate(f'group:{instance.slug}')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    cache_tags.invalidate(f'post:{instance.post_id}')
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_follow_pages(sender, instance, **kwargs):
+    cache_tags.invalidate(
+        f'author:{instance.author_id}', f'author:{instance.user_id}'
+    )
@@ -0,0 +1,39 @@
+from django import template
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils import translation
+from django.utils.safestring import mark_safe
+
+register = template.Library()
+
+CARD_TEMPLATE = 'posts/includes/post_card.html'
+
+
+def card_key(post):
+    """Ключ карточки: id поста, время его изменения и язык."""
+    version = int(post.updated.timestamp() * 1000000)
+    language = translation.get_language()
+    return f'post_card:{post.pk}:{version}:{language}'
+
+
+@register.simple_tag
+def post_cards(posts):
+    """Возвращает HTML карточек постов из общего для всех лент кэша.
+
+    {% post_cards page_obj as cards %}
+
+    Карточки страницы читаются одним get_many, недостающие
+    отрисовываются и сохраняются одним set_many. Карточка не зависит
+    от пользователя, поэтому отрисовывается без контекста запроса.
+    """
+    keys = {card_key(post): post for post in posts}
+    cards = cache.get_many(keys)
+    missing = {}
+    card_template = get_template(CARD_TEMPLATE)
+    for key, post in keys.items():
+        if key not in cards:
+            cards[key] = missing[key] = card_template.render({'post': post})
+    if missing:
+        cache.set_many(missing, settings.POST_CARD_CACHE_TIMEOUT)
+    return [mark_safe(cards[key]) for key in keys]
@@ -0,0 +1,68 @@
+import logging
+
+from django import template
+from django.conf import settings
+from sorl.thumbnail import default
+
+from ..thumbnails import variants
+
+logger = logging.getLogger(__name__)
+
+register = template.Library()
+
+
+@register.inclusion_tag('posts/includes/picture.html')
+def post_picture(image, lazy=True):
+    """Картинка поста в <picture>: все форматы и ширины из настроек.
+
+    {% post_picture post.image %}
+    {% post_picture post.image lazy=False %}
+
+    Пока варианты не нарисованы, показывается исходная картинка. Пока
+    картинка грузится (по умолчанию — лениво), на её месте видна
+    размытая заглушка поста.
+    """
+    aspect_width, aspect_height = settings.POST_IMAGE_ASPECT
+    post = getattr(image, 'instance', None)
+    context = {
+        'image': image,
+        'lazy': lazy,
+        'placeholder': getattr(post, 'image_placeholder', ''),
+        'width': getattr(post, 'image_width', None) or aspect_width,
+        'height': getattr(post, 'image_height', None) or aspect_height,
+        'sizes': settings.POST_IMAGE_SIZES,
+        'aspect_width': aspect_width,
+        'aspect_height': aspect_height,
+        'sources': None,
+    }
+    if not image:
+        return context
+    src_width = min(
+        settings.POST_IMAGE_WIDTHS,
+        key=lambda width: abs(width - aspect_width)
+    )
+    sources = {}
+    for image_format, width, geometry, options in variants():
+        try:
+            thumbnail = default.backend.get_thumbnail(
+                image, geometry, **options
+            )
+        except Exception:
+            # Как и в {% thumbnail %}: битая картинка не ломает страницу.
+            logger.exception('Не удалось получить миниатюру %s', image)
+            return context
+        if not thumbnail:
+            return context
+        source = sources.setdefault(image_format, {
+            'type': f'image/{image_format.lower()}',
+            'srcset': [],
+        })
+        source['srcset'].append(f'{thumbnail.url} {width}w')
+        if width == src_width:
+            source['src'] = thumbnail.url
+    sources = list(sources.values())
+    for source in sources:
+        source['srcset'] = ', '.join(source['srcset'])
+    context['img'] = sources.pop()
+    context['sources'] = sources
+    return context
@@ -0,0 +1,17 @@
+from django import template
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from ..search import MARK_END, MARK_START
+
+register = template.Library()
+
+
+@register.filter
+def highlight(snippet):
+    """Экранирует сниппет поиска и подсвечивает найденные слова."""
+    return mark_safe(
+        escape(snippet).replace(MARK_START, '<mark>').replace(
+            MARK_END, '</mark>'
+        )
+    )
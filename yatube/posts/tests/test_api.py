@@ -0,0 +1,159 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+from ..timelines import FOLLOW_FEED_ENGINES
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(
+            username='Test_user', first_name='Имя', last_name='Фамилия'
+        )
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(12):
+            Post.objects.create(
+                text=f'Текст № {i}',
+                author=User.objects.create_user(username=f'Author_{i}'),
+                group=cls.group,
+            )
+            Post.objects.create(text=f'Пост № {i}', author=cls.user)
+        cls.post = Post.objects.filter(author=cls.user).first()
+        for i in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f'Комментарий {i}'
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def get_json(self, url, client=None, status=200, **params):
+        response = (client or self.guest_client).get(url, params)
+        self.assertEqual(response.status_code, status)
+        return response.json()
+
+    def test_collections_take_one_query(self):
+        """Каждая страница списка — один запрос, без N+1."""
+        urls = [
+            reverse('posts:api_posts'),
+            reverse('posts:api_group_posts', args=[self.group.slug]),
+            reverse('posts:api_profile_posts', args=[self.user.username]),
+            reverse('posts:api_post_comments', args=[self.post.pk]),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                with self.assertNumQueries(1):
+                    data = self.get_json(url)
+                self.assertTrue(data['results'])
+
+    def test_cursor_pagination(self):
+        """Курсор next ведёт на следующую страницу без повторов."""
+        url = reverse('posts:api_posts')
+        first = self.get_json(url, fields='id')
+        second = self.get_json(url, fields='id', after=first['next'])
+        third = self.get_json(url, fields='id', after=second['next'])
+        ids = [
+            post['id']
+            for page in (first, second, third)
+            for post in page['results']
+        ]
+        self.assertEqual(
+            ids, list(Post.objects.values_list('pk', flat=True))
+        )
+        self.assertIsNone(first['previous'])
+        self.assertIsNone(third['next'])
+
+    def test_sparse_fieldsets(self):
+        """fields= сужает и ответ, и читаемые столбцы."""
+        url = reverse('posts:api_posts')
+        with CaptureQueriesContext(connection) as queries:
+            data = self.get_json(url, fields='id,author')
+        self.assertEqual(set(data['results'][0]), {'id', 'author'})
+        sql = queries[0]['sql']
+        self.assertIn('"auth_user"."username"', sql)
+        self.assertNotIn('"posts_post"."text"', sql)
+        self.assertNotIn('posts_group', sql)
+
+    def test_unknown_field(self):
+        """Неизвестное поле — ошибка 400 в JSON."""
+        data = self.get_json(
+            reverse('posts:api_posts'), status=400, fields='id,secret'
+        )
+        self.assertIn('secret', data['detail'])
+
+    def test_details(self):
+        """Пост, группа и профиль отдаются одним запросом."""
+        details = {
+            reverse('posts:api_post', args=[self.post.pk]): {
+                'id': self.post.pk,
+                'author': self.user.username,
+                'group': None,
+                'comments_count': 3,
+            },
+            reverse('posts:api_group', args=[self.group.slug]): {
+                'title': self.group.title,
+            },
+            reverse('posts:api_profile', args=[self.user.username]): {
+                'name': 'Имя Фамилия',
+                'posts_count': 12,
+                'followers_count': 1,
+            },
+        }
+        for url, expected in details.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(1):
+                    data = self.get_json(url)
+                for name, value in expected.items():
+                    self.assertEqual(data[name], value)
+
+    def test_missing_objects(self):
+        """Несуществующие родители и объекты — 404 в JSON."""
+        urls = [
+            reverse('posts:api_post', args=[999]),
+            reverse('posts:api_post_comments', args=[999]),
+            reverse('posts:api_group', args=['nothing']),
+            reverse('posts:api_group_posts', args=['nothing']),
+            reverse('posts:api_profile', args=['nobody']),
+            reverse('posts:api_profile_posts', args=['nobody']),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertIn('detail', self.get_json(url, status=404))
+
+    def test_follow_posts(self):
+        """Лента подписок доступна после входа и без лишних запросов."""
+        url = reverse('posts:api_follow')
+        self.get_json(url, status=401)
+        for engine in FOLLOW_FEED_ENGINES:
+            with self.subTest(engine=engine), \
+                    override_settings(FOLLOW_FEED_ENGINE=engine):
+                cache.clear()
+                with CaptureQueriesContext(connection) as queries:
+                    data = self.get_json(
+                        url,
+                        self.authorized_client,
+                        fields='author,comments_count',
+                    )
+                self.assertLess(len(queries), 10)
+                self.assertEqual(len(data['results']), 10)
+                self.assertEqual(
+                    {post['author'] for post in data['results']},
+                    {self.user.username}
+                )
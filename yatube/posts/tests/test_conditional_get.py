@@ -0,0 +1,108 @@
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.post = Post.objects.create(
+            text='Тестовый текст', author=cls.user, group=cls.group
+        )
+        cls.urls = [
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': cls.group.slug}),
+            reverse('posts:profile', kwargs={'username': cls.user}),
+            reverse('posts:post_detail', kwargs={'post_id': cls.post.pk}),
+        ]
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def test_not_modified_without_page_query(self):
+        """Совпавший ETag даёт 304 без запроса страницы и отрисовки."""
+        # На профиле и странице поста валидатор читает автора и пост.
+        queries = [0, 0, 1, 1]
+        for url, count in zip(self.urls, queries):
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                with self.assertNumQueries(count):
+                    response = self.guest_client.get(
+                        url, HTTP_IF_NONE_MATCH=etag
+                    )
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response.content, b'')
+
+    def test_etag_changes_with_content(self):
+        """Новый пост и комментарий меняют ETag своих страниц."""
+        etags = [self.guest_client.get(url)['ETag'] for url in self.urls]
+        Post.objects.create(
+            text='Новый пост', author=self.user, group=self.group
+        )
+        Comment.objects.create(
+            post=self.post, author=self.user, text='Комментарий'
+        )
+        for url, etag in zip(self.urls, etags):
+            with self.subTest(url=url):
+                response = self.guest_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_stale_page_has_no_etag(self):
+        """Страница с прежним фрагментом отдаётся без ETag."""
+        url = reverse('posts:index')
+        self.guest_client.get(url)
+        Post.objects.create(text='Новый пост', author=self.user)
+        add = cache.add
+
+        def locked(key, *args, **kwargs):
+            # Фрагмент пересчитывает другой процесс.
+            return not key.startswith('lock.') and add(key, *args, **kwargs)
+
+        with patch('core.cache_tags.cache.add', locked):
+            response = self.guest_client.get(url)
+        self.assertNotContains(response, 'Новый пост')
+        self.assertFalse(response.has_header('ETag'))
+        response = self.guest_client.get(url)
+        self.assertContains(response, 'Новый пост')
+        self.assertTrue(response.has_header('ETag'))
+
+    def test_etag_differs_between_viewers(self):
+        """Гость и автор не получают чужую страницу по ETag."""
+        for url in self.urls:
+            with self.subTest(url=url):
+                etag = self.guest_client.get(url)['ETag']
+                response = self.authorized_client.get(
+                    url, HTTP_IF_NONE_MATCH=etag
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_missing_pages_are_not_validated(self):
+        """Для несуществующего автора и поста ответ — 404, а не 304."""
+        urls = [
+            reverse('posts:profile', kwargs={'username': 'nobody'}),
+            reverse('posts:post_detail', kwargs={'post_id': 999}),
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.guest_client.get(url, HTTP_IF_NONE_MATCH='*')
+                self.assertEqual(response.status_code, 404)
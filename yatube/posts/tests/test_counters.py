@@ -0,0 +1,109 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+
+from ..models import Comment, Follow, Group, MediaFile, Post, UserStats
+
+User = get_user_model()
+
+
+class CounterTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.other_group = Group.objects.create(
+            title='test-title 2',
+            slug='test-slug_2',
+            description='test-decsr 2',
+        )
+
+    def assertCounters(self, post=None, **expected):
+        stats = {
+            'posts': UserStats.objects.get(user=self.user).posts_count,
+            'followers': UserStats.objects.get(
+                user=self.user
+            ).followers_count,
+            'following': UserStats.objects.get(
+                user=self.reader
+            ).following_count,
+            'group': Group.objects.get(pk=self.group.pk).posts_count,
+            'other_group': Group.objects.get(
+                pk=self.other_group.pk
+            ).posts_count,
+        }
+        if post is not None:
+            stats['comments'] = Post.objects.get(pk=post.pk).comments_count
+        for name, value in expected.items():
+            with self.subTest(counter=name):
+                self.assertEqual(stats[name], value)
+
+    def test_counters_follow_changes(self):
+        """Счётчики меняются при создании и удалении объектов."""
+        post = Post.objects.create(
+            text='Текст', author=self.user, group=self.group
+        )
+        Post.objects.create(text='Текст', author=self.user)
+        Follow.objects.create(user=self.reader, author=self.user)
+        comment = Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        self.assertCounters(
+            post, posts=2, followers=1, following=1, group=1, comments=1
+        )
+        post.group = self.other_group
+        post.save()
+        self.assertCounters(group=0, other_group=1)
+        comment.delete()
+        Follow.objects.filter(user=self.reader, author=self.user).delete()
+        self.assertCounters(post, followers=0, following=0, comments=0)
+        post.delete()
+        self.assertCounters(posts=1, other_group=0)
+
+    def test_recount_repairs_drift(self):
+        """Команда recount_counters исправляет расхождения."""
+        post = Post.objects.create(
+            text='Текст', author=self.user, group=self.group
+        )
+        Follow.objects.create(user=self.reader, author=self.user)
+        Comment.objects.create(
+            post=post, author=self.reader, text='Комментарий'
+        )
+        UserStats.objects.update(
+            posts_count=7, followers_count=7, following_count=7
+        )
+        Group.objects.update(posts_count=7)
+        Post.objects.update(comments_count=7)
+        call_command('recount_counters', stdout=StringIO())
+        self.assertCounters(
+            post, posts=1, followers=1, following=1, group=1,
+            other_group=0, comments=1
+        )
+
+    def test_recount_creates_many_stats(self):
+        """Записи UserStats заводятся больше чем для 500 пользователей."""
+        # SQLite вставляет не больше 500 строк одним запросом.
+        User.objects.bulk_create(
+            User(username=f'user_{i}') for i in range(600)
+        )
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(
+            UserStats.objects.count(), User.objects.count()
+        )
+
+    def test_recount_creates_many_media_files(self):
+        """Записи MediaFile заводятся больше чем для 500 картинок."""
+        Post.objects.bulk_create(
+            Post(text='Текст', author=self.user, image=f'posts/{i}.gif')
+            for i in range(600)
+        )
+        call_command('recount_counters', stdout=StringIO())
+        self.assertEqual(MediaFile.objects.filter(refs=1).count(), 600)
@@ -0,0 +1,125 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ExportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=cls.other, author=cls.user)
+        for i in range(5):
+            post = Post.objects.create(
+                text=f'Текст № {i}', author=cls.user, group=cls.group
+            )
+            Comment.objects.create(post=post, author=cls.other, text='Ок')
+        cls.old_post = Post.objects.create(text='Старый', author=cls.other)
+        Post.objects.filter(pk=cls.old_post.pk).update(
+            pub_date=timezone.now() - timedelta(days=30)
+        )
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+
+    def export(self, *args, **options):
+        out = StringIO()
+        call_command('export_posts', *args, stdout=out, stderr=StringIO(),
+                     **options)
+        return [json.loads(line) for line in out.getvalue().splitlines()]
+
+    def models(self, records):
+        return [record['model'] for record in records]
+
+    def test_exports_all_tables(self):
+        """Выгружаются все таблицы, пользователи — по имени."""
+        records = self.export()
+        self.assertEqual(self.models(records), (
+            ['posts.group'] + ['posts.post'] * 6 + ['posts.comment'] * 5
+            + ['posts.follow']
+        ))
+        post = records[1]
+        self.assertEqual(post['fields']['author'], ['Test_user'])
+        self.assertEqual(post['fields']['group'], self.group.pk)
+
+    def test_reads_in_batches(self):
+        """Таблица читается запросами по batch_size записей."""
+        # Три пачки постов по два и пустой запрос в конце.
+        with self.assertNumQueries(4):
+            records = self.export(tables=['posts'], batch_size=2)
+        self.assertEqual(len(records), 6)
+
+    def test_filters(self):
+        """Фильтры по автору, группе и датам."""
+        today = timezone.now().date().isoformat()
+        cases = [
+            (
+                ['--author=Test_user', '--tables', 'posts', 'follows'],
+                ['posts.post'] * 5 + ['posts.follow'],
+            ),
+            (
+                [
+                    '--group=test-slug',
+                    '--tables', 'groups', 'posts', 'comments',
+                ],
+                ['posts.group'] + ['posts.post'] * 5 + ['posts.comment'] * 5,
+            ),
+            (
+                [f'--since={today}', f'--until={today}', '--tables', 'posts'],
+                ['posts.post'] * 5,
+            ),
+        ]
+        for args, models in cases:
+            with self.subTest(args=args):
+                self.assertEqual(self.models(self.export(*args)), models)
+
+    def test_incremental_export_with_state(self):
+        """С --state повторная выгрузка берёт только новые записи."""
+        state = os.path.join(self.directory, 'state.json')
+        self.assertEqual(len(self.export(state=state)), 13)
+        self.assertEqual(self.export(state=state), [])
+        post = Post.objects.create(text='Новый', author=self.user)
+        records = self.export(state=state)
+        self.assertEqual([record['pk'] for record in records], [post.pk])
+
+    def test_incremental_export_includes_edits(self):
+        """Отредактированный пост попадает в следующую выгрузку."""
+        state = os.path.join(self.directory, 'state.json')
+        self.export(state=state, tables=['posts'])
+        self.old_post.text = 'Исправленный'
+        self.old_post.save()
+        records = self.export(state=state, tables=['posts'])
+        self.assertEqual(
+            [(record['pk'], record['fields']['text']) for record in records],
+            [(self.old_post.pk, 'Исправленный')],
+        )
+        self.assertEqual(self.export(state=state, tables=['posts']), [])
+
+    def test_gzip_output(self):
+        """Файл *.gz сжимается."""
+        path = os.path.join(self.directory, 'posts.ndjson.gz')
+        call_command(
+            'export_posts', tables=['posts'], output=path, stderr=StringIO()
+        )
+        with gzip.open(path, 'rt', encoding='utf-8') as file:
+            self.assertEqual(len(file.readlines()), 6)
@@ -0,0 +1,99 @@
+import json
+from xml.etree import ElementTree
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from ..models import Group, Post
+
+User = get_user_model()
+
+ATOM = '{http://www.w3.org/2005/Atom}'
+
+
+@override_settings(FEED_ITEMS=5, FEED_WINDOW=2)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.other = User.objects.create_user(username='Other')
+        for i in range(7):
+            Post.objects.create(
+                text=f'Текст № {i} <b>', author=cls.user, group=cls.group
+            )
+        Post.objects.create(text='Чужой пост', author=cls.other)
+
+    def setUp(self):
+        self.client = Client()
+        cache.clear()
+
+    def get(self, name, feed_format, *args):
+        response = self.client.get(
+            reverse(f'posts:{name}', args=[*args, feed_format])
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        return response, b''.join(response.streaming_content)
+
+    def titles(self, feed_format, content):
+        if feed_format == 'json':
+            return [item['title'] for item in json.loads(content)['items']]
+        root = ElementTree.fromstring(content)
+        if feed_format == 'rss':
+            return [item.findtext('title') for item in root.iter('item')]
+        return [
+            entry.findtext(f'{ATOM}title')
+            for entry in root.iter(f'{ATOM}entry')
+        ]
+
+    def test_feeds_list_newest_posts(self):
+        """Ленты всех форматов отдают FEED_ITEMS последних постов."""
+        feeds = {
+            ('index_feed',): 'Чужой пост',
+            ('group_feed', self.group.slug): 'Текст № 6 <b>',
+            ('profile_feed', self.user.username): 'Текст № 6 <b>',
+        }
+        for (name, *args), newest in feeds.items():
+            for feed_format in ('rss', 'atom', 'json'):
+                with self.subTest(name=name, feed_format=feed_format):
+                    _, content = self.get(name, feed_format, *args)
+                    titles = self.titles(feed_format, content)
+                    self.assertEqual(len(titles), 5)
+                    self.assertEqual(titles[0], newest)
+
+    def test_feed_is_read_in_windows(self):
+        """Посты читаются окнами по FEED_WINDOW, а не все сразу."""
+        # Пять постов — три окна по два, каждое своим запросом во
+        # время отдачи ответа.
+        response = self.client.get(reverse('posts:index_feed', args=['rss']))
+        with self.assertNumQueries(3):
+            b''.join(response.streaming_content)
+
+    def test_feed_not_modified_until_posts_change(self):
+        """ETag ленты меняется вместе с её постами."""
+        url = reverse('posts:group_feed', args=[self.group.slug, 'atom'])
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(text='Новый', author=self.user, group=self.group)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_missing_feeds(self):
+        """Ленты несуществующих группы и автора отдают 404."""
+        urls = [
+            reverse('posts:group_feed', args=['nothing', 'rss']),
+            reverse('posts:profile_feed', args=['nobody', 'rss']),
+            '/feed/xml/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.client.get(url).status_code, 404)
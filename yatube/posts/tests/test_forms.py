@@ -8,10 +8,12 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from django.test import Client, TestCase, override_settings
 from django.urls import reverse
 
-from ..models import Group, Post
+from ..models import Group, MediaFile, Post
 
 User = get_user_model()
 TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+# Имя по хэшу содержимого, разложенное по каталогам (core.storage).
+STORED_GIF_NAME = r'^posts/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.gif$'
 
 
 @override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
@@ -76,7 +78,7 @@ class PostPagesTests(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group.pk, form_data['group'])
         self.assertEqual(post.author, self.user)
-        self.assertEqual(post.image, 'posts/small.gif')
+        self.assertRegex(post.image.name, STORED_GIF_NAME)
 
     def test_edit_post(self):
         self.post = Post.objects.create(
@@ -102,3 +104,33 @@ class PostPagesTests(TestCase):
         self.assertEqual(post.text, form_data['text'])
         self.assertEqual(post.group.pk, form_data['group'])
         self.assertEqual(post.author, self.post.author)
+
+    def test_same_image_is_stored_once(self):
+        """Одинаковые картинки хранятся одним файлом со счётчиком ссылок."""
+        small_gif = (
+            b'\x47\x49\x46\x38\x39\x61\x02\x00'
+            b'\x01\x00\x80\x00\x00\x00\x00\x00'
+            b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+            b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+            b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+            b'\x0A\x00\x3B'
+        )
+        for name in ('first.gif', 'second.gif'):
+            self.authorized_client.post(
+                reverse('posts:post_create'),
+                data={
+                    'text': name,
+                    'image': SimpleUploadedFile(
+                        name, small_gif, content_type='image/gif'
+                    ),
+                },
+            )
+        first, second = Post.objects.order_by('pk')
+        self.assertEqual(first.image.name, second.image.name)
+        self.assertEqual(MediaFile.objects.get(name=first.image.name).refs, 2)
+        second.delete()
+        self.assertEqual(MediaFile.objects.get(name=first.image.name).refs, 1)
+        name = first.image.name
+        first.image = ''
+        first.save()
+        self.assertEqual(MediaFile.objects.get(name=name).refs, 0)
@@ -0,0 +1,111 @@
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+# Теги EXIF: ориентация снимка и производитель камеры.
+ORIENTATION = 0x0112
+MAKE = 0x010F
+
+
+def make_jpeg(size, orientation=1):
+    image = Image.linear_gradient('L').resize(size).convert('RGB')
+    exif = Image.Exif()
+    exif[ORIENTATION] = orientation
+    exif[MAKE] = 'Camera maker'
+    buffer = BytesIO()
+    image.save(buffer, 'JPEG', quality=100, exif=exif.tobytes())
+    return SimpleUploadedFile(
+        'photo.JPG', buffer.getvalue(), content_type='image/jpeg'
+    )
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, POST_IMAGE_MAX_SIDE=800)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+
+    def create_post(self, upload):
+        return self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'Пост с фото', 'image': upload},
+        )
+
+    def test_photo_is_normalized(self):
+        """Фото поворачивается по EXIF, уменьшается и теряет метаданные."""
+        upload = make_jpeg((2000, 1000), orientation=6)
+        self.create_post(upload)
+        post = Post.objects.get(text='Пост с фото')
+        self.assertTrue(post.image.name.endswith('.jpg'))
+        self.assertLess(post.image.size, upload.size)
+        with Image.open(post.image) as image:
+            self.assertEqual(image.size, (400, 800))
+            self.assertFalse(image.getexif())
+
+    @override_settings(POST_IMAGE_MAX_PIXELS=1000 * 1000)
+    def test_too_many_pixels(self):
+        """Картинка больше предела пикселей отклоняется."""
+        response = self.create_post(make_jpeg((2000, 1000)))
+        self.assertFormError(
+            response, 'form', 'image', 'Картинка больше 1 мегапикселей.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_UPLOAD_SIZE=1024)
+    def test_too_large_file(self):
+        """Файл больше предела отклоняется."""
+        response = self.create_post(make_jpeg((2000, 1000)))
+        self.assertFormError(
+            response, 'form', 'image', 'Файл больше 1,0\xa0КБ.'
+        )
+        self.assertFalse(Post.objects.exists())
+
+    def test_placeholder_is_stored(self):
+        """Размеры и заглушка картинки сохраняются в посте."""
+        self.create_post(make_jpeg((2000, 1000), orientation=6))
+        post = Post.objects.get(text='Пост с фото')
+        self.assertEqual((post.image_width, post.image_height), (400, 800))
+        self.assertTrue(
+            post.image_placeholder.startswith('data:image/webp;base64,')
+        )
+        self.assertLess(len(post.image_placeholder), 500)
+        cache.clear()
+        response = self.client.get(reverse('posts:index'))
+        self.assertContains(response, post.image_placeholder)
+        self.assertContains(response, 'loading="lazy"')
+        self.assertContains(response, 'width="400" height="800"')
+
+    def test_placeholders_are_backfilled(self):
+        """Команда считает заглушки картинок, загруженных раньше."""
+        self.create_post(make_jpeg((600, 300)))
+        post = Post.objects.get(text='Пост с фото')
+        Post.objects.update(image_placeholder='', image_width=None)
+        call_command('describe_post_images', stdout=StringIO())
+        described = Post.objects.get(pk=post.pk)
+        self.assertEqual(described.image_placeholder, post.image_placeholder)
+        self.assertEqual(described.image_width, 600)
+        self.assertGreater(described.updated, post.updated)
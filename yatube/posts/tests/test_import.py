@@ -0,0 +1,256 @@
+import json
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from io import StringIO
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .. import bulk_import
+from ..models import Comment, Follow, Group, Post, TimelineEntry, UserStats
+
+User = get_user_model()
+
+PUB_DATE = timezone.make_aware(datetime(2020, 1, 2, 3, 4, 5))
+
+
+class ImportTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(3):
+            post = Post.objects.create(
+                text=f'Текст № {i}', author=cls.user, group=cls.group
+            )
+            Comment.objects.create(post=post, author=cls.reader, text='Ок')
+        Post.objects.update(pub_date=PUB_DATE)
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        cache.clear()
+
+    def write(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(content)
+        return path
+
+    def load(self, path, **options):
+        out = StringIO()
+        call_command('import_posts', path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_export_round_trip(self):
+        """Выгрузка export_posts загружается с исходными датами."""
+        path = os.path.join(self.directory, 'dump.ndjson.gz')
+        call_command('export_posts', output=path, stderr=StringIO())
+        report = self.load(path, batch_size=2)
+        self.assertIn('записей/с', report)
+        self.assertEqual(Group.objects.count(), 1)
+        self.assertEqual(Post.objects.count(), 6)
+        self.assertEqual(
+            set(Post.objects.values_list('pub_date', flat=True)), {PUB_DATE}
+        )
+        imported = Post.objects.order_by('-pk')[:3]
+        for post in imported:
+            self.assertEqual(post.comments.count(), 1)
+            self.assertEqual(post.comments_count, 1)
+        # Подписка уже есть: дубликат пропущен.
+        self.assertEqual(Follow.objects.count(), 1)
+        self.assertNotIn('follows', report.split('Пропущено')[0])
+        self.assertIn('Пропущено: follows — 1', report)
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 6)
+
+    def test_csv_posts(self):
+        """Посты из CSV: новые авторы создаются, группа ищется по slug."""
+        path = self.write('posts.csv', (
+            'id,text,author,group,pub_date\n'
+            '1,Первый импорт,newcomer,test-slug,2021-05-06T07:08:09\n'
+            '2,Второй импорт,Test_user,,\n'
+        ))
+        self.load(path, table='posts')
+        first = Post.objects.get(text='Первый импорт')
+        self.assertEqual(first.author.username, 'newcomer')
+        self.assertFalse(first.author.has_usable_password())
+        self.assertEqual(first.group, self.group)
+        self.assertEqual(
+            first.pub_date,
+            timezone.make_aware(datetime(2021, 5, 6, 7, 8, 9)),
+        )
+        second = Post.objects.get(text='Второй импорт')
+        self.assertIsNone(second.group)
+        self.assertLess(timezone.now() - second.pub_date, timedelta(10))
+
+    def test_csv_comments_in_second_run(self):
+        """С --id-map комментарии из отдельного CSV находят посты."""
+        id_map = os.path.join(self.directory, 'ids.json')
+        posts = self.write('posts.csv', 'id,text,author\n7,Пост,Reader\n')
+        comments = self.write(
+            'comments.csv', 'post,text,author\n7,Комментарий,Test_user\n'
+        )
+        self.load(posts, table='posts', id_map=id_map)
+        self.load(comments, table='comments', id_map=id_map)
+        post = Post.objects.get(text='Пост')
+        self.assertEqual(
+            list(post.comments.values_list('text', flat=True)),
+            ['Комментарий'],
+        )
+        self.assertEqual(Post.objects.get(pk=post.pk).comments_count, 1)
+
+    def test_many_new_authors(self):
+        """Загрузка больше 500 новых авторов чинит их счётчики."""
+        id_map = os.path.join(self.directory, 'ids.json')
+        path = self.write('posts.csv', 'id,text,author\n' + ''.join(
+            f'{i},Пост,author_{i}\n' for i in range(600)
+        ))
+        self.load(path, table='posts', id_map=id_map)
+        self.assertEqual(
+            UserStats.objects.filter(
+                user__username__startswith='author_', posts_count=1
+            ).count(),
+            600,
+        )
+        with open(id_map) as file:
+            self.assertEqual(len(json.load(file)['posts']), 600)
+
+    def test_id_map_saved_when_finish_fails(self):
+        """id загруженных постов сохраняются и при сбое finish()."""
+        id_map = os.path.join(self.directory, 'ids.json')
+        path = self.write('posts.csv', 'id,text,author\n7,Пост,Reader\n')
+        with patch.object(
+            bulk_import.Importer, 'finish', side_effect=DatabaseError
+        ):
+            with self.assertRaises(DatabaseError):
+                self.load(path, table='posts', id_map=id_map)
+        with open(id_map) as file:
+            self.assertEqual(
+                json.load(file)['posts'],
+                {'7': Post.objects.get(text='Пост').pk},
+            )
+
+    def test_comments_without_posts_fail(self):
+        """Комментарий к незагруженному посту останавливает загрузку."""
+        path = self.write('comments.csv', 'post,text\n7,Комментарий\n')
+        with self.assertRaisesMessage(CommandError, '--id-map'):
+            self.load(path, table='comments')
+        self.assertEqual(Comment.objects.count(), 3)
+
+    def test_deleted_post_ids_not_reused(self):
+        """Загруженные посты не получают id удалённых."""
+        deleted = Post.objects.create(text='Удалённый', author=self.user)
+        Post.objects.filter(pk=deleted.pk).delete()
+        path = self.write('posts.csv', 'text,author\nНовый,Reader\n')
+        self.load(path, table='posts')
+        imported = Post.objects.get(text='Новый')
+        self.assertGreater(imported.pk, deleted.pk)
+        created = Post.objects.create(text='С сайта', author=self.user)
+        self.assertGreater(created.pk, imported.pk)
+
+    def test_csv_follows_count_inserted(self):
+        """Дубликаты и подписки на себя считаются пропущенными."""
+        path = self.write('follows.csv', (
+            'user,author\n'
+            'Test_user,Reader\n'
+            'Test_user,Reader\n'
+            'Reader,Test_user\n'
+            'Reader,Reader\n'
+        ))
+        report = self.load(path, table='follows')
+        self.assertIn('Загружено: follows — 1.', report)
+        self.assertIn('Пропущено: follows — 3', report)
+        self.assertEqual(Follow.objects.count(), 2)
+
+    def test_finish_recounts_only_imported(self):
+        """После загрузки пересчитываются только затронутые счётчики."""
+        Post.objects.update(comments_count=7)
+        UserStats.objects.filter(user=self.reader).update(posts_count=7)
+        path = self.write('posts.csv', 'text,author\nНовый,Test_user\n')
+        self.load(path, table='posts')
+        self.assertEqual(UserStats.objects.get(user=self.user).posts_count, 4)
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).posts_count, 7
+        )
+        self.assertEqual(
+            set(Post.objects.exclude(text='Новый').values_list(
+                'comments_count', flat=True
+            )),
+            {7},
+        )
+
+    @override_settings(FOLLOW_FEED_ENGINE='timeline')
+    def test_import_extends_timelines(self):
+        """Ленты дополняются постами загруженных авторов и подписок."""
+        other = User.objects.create_user(username='Other')
+        Follow.objects.create(user=other, author=self.reader)
+        kept = Post.objects.create(text='С сайта', author=self.reader)
+        self.load(
+            self.write('posts.csv', 'text,author\nНовый,Test_user\n'),
+            table='posts',
+        )
+        self.load(
+            self.write('follows.csv', 'user,author\nOther,Test_user\n'),
+            table='follows',
+        )
+        new = Post.objects.get(text='Новый')
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=new).exists()
+        )
+        self.assertEqual(
+            set(TimelineEntry.objects.filter(user=other).values_list(
+                'post_id', flat=True
+            )),
+            {kept.pk, *Post.objects.filter(
+                author=self.user
+            ).values_list('pk', flat=True)},
+        )
+
+    def test_pages_see_imported_posts(self):
+        """Кэш страниц и поиск видят загруженные посты."""
+        client = Client()
+        client.get(reverse('posts:index'))
+        path = self.write('posts.csv', 'text,author\nИмпортированный,Reader\n')
+        self.load(path, table='posts')
+        response = client.get(reverse('posts:index'))
+        self.assertContains(response, 'Импортированный')
+        response = client.get(
+            reverse('posts:search'), {'q': 'Импортированный'}
+        )
+        self.assertEqual(len(response.context['page_obj']), 1)
+
+    def test_bad_row_keeps_previous_batches(self):
+        """Ошибочная запись останавливает загрузку после целых пачек."""
+        path = self.write('posts.csv', (
+            'text,author,pub_date\n'
+            'Хороший,Reader,2021-01-01T00:00:00\n'
+            'Плохой,Reader,вчера\n'
+        ))
+        with self.assertRaises(CommandError):
+            self.load(path, table='posts', batch_size=1)
+        self.assertTrue(Post.objects.filter(text='Хороший').exists())
+        self.assertFalse(Post.objects.filter(text='Плохой').exists())
+        self.assertEqual(
+            UserStats.objects.get(user=self.reader).posts_count, 1
+        )
+
+    def test_csv_requires_table(self):
+        """CSV без --table не загружается."""
+        path = self.write('posts.csv', 'text,author\n')
+        with self.assertRaises(CommandError):
+            self.load(path)
@@ -0,0 +1,108 @@
+import os
+import shutil
+import tempfile
+import time
+from io import BytesIO, StringIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+from sorl.thumbnail import default
+
+from .. import media_gc, thumbnails
+from ..models import MediaFile, Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_png(color):
+    buffer = BytesIO()
+    Image.new('RGB', (8, 4), color).save(buffer, 'PNG')
+    return SimpleUploadedFile('picture.png', buffer.getvalue(), 'image/png')
+
+
+@override_settings(
+    MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0, MEDIA_GC_GRACE=0
+)
+class MediaGarbageCollectorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(shutil.rmtree, TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.kept = Post.objects.create(
+            text='Пост', author=self.user, image=make_png('red')
+        )
+        self.dropped = Post.objects.create(
+            text='Удалённый пост', author=self.user, image=make_png('blue')
+        )
+        thumbnails.generate(self.kept.image.name)
+        thumbnails.generate(self.dropped.image.name)
+        self.dropped_name = self.dropped.image.name
+        self.dropped.delete()
+        self.stray = default.storage.save(
+            'cache/00/00/stray.jpg', ContentFile(b'stray')
+        )
+
+    def get_thumbnail_names(self):
+        return list(media_gc.walk(default.storage, 'cache'))
+
+    def test_dry_run_deletes_nothing(self):
+        """Пробный запуск только считает мусор."""
+        before = self.get_thumbnail_names()
+        counts = media_gc.collect(dry_run=True)
+        self.assertEqual(counts['images'], 1)
+        self.assertEqual(counts['orphaned_thumbnails'], 1)
+        self.assertEqual(counts['expired_thumbnails'], 0)
+        self.assertTrue(default.storage.exists(self.stray))
+        self.assertEqual(self.get_thumbnail_names(), before)
+
+    def test_orphans_are_deleted(self):
+        """Картинки без постов и лишние миниатюры удаляются."""
+        storage = self.kept.image.storage
+        kept_thumbnails = len(list(thumbnails.variants()))
+        media_gc.collect(batch_size=2)
+        self.assertFalse(storage.exists(self.dropped_name))
+        self.assertFalse(MediaFile.objects.filter(name=self.dropped_name))
+        self.assertTrue(storage.exists(self.kept.image.name))
+        self.assertFalse(default.storage.exists(self.stray))
+        self.assertEqual(len(self.get_thumbnail_names()), kept_thumbnails)
+        self.assertEqual(media_gc.collect(), {
+            'images': 0,
+            'orphaned_thumbnails': 0,
+            'expired_thumbnails': 0,
+            'kvstore_entries': 0,
+        })
+
+    def test_unused_thumbnails_expire(self):
+        """Давно не показанные миниатюры удаляются вместе с записями."""
+        media_gc.collect()
+        long_ago = time.time() - settings.THUMBNAIL_MAX_AGE - 60
+        for name in self.get_thumbnail_names():
+            os.utime(default.storage.path(name), (long_ago, long_ago))
+        _, _, geometry, options = next(thumbnails.variants())
+        shown = default.backend.get_thumbnail(
+            self.kept.image, geometry, **options
+        )
+        counts = media_gc.collect()
+        self.assertEqual(
+            counts['expired_thumbnails'], len(list(thumbnails.variants())) - 1
+        )
+        self.assertEqual(self.get_thumbnail_names(), [shown.name])
+
+    def test_command_refuses_short_max_age(self):
+        """Миниатюры не удаляются раньше, чем уйдут из кэша страниц."""
+        with self.assertRaises(CommandError):
+            call_command('collect_media', max_age=1)
+        out = StringIO()
+        call_command('collect_media', dry_run=True, stdout=out)
+        self.assertIn('картинок без постов — 1', out.getvalue())
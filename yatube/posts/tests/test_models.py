@@ -1,7 +1,8 @@
 from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
 from django.test import TestCase
 
-from ..models import Group, Post
+from ..models import Follow, Group, Post
 
 User = get_user_model()
 
@@ -32,3 +33,12 @@ class PostModelTest(TestCase):
         group = self.group
         excepted = group.title[:15]
         self.assertEqual(excepted, str(group))
+
+    def test_follow_is_unique(self):
+        """Повторная подписка на того же автора не создаётся"""
+        reader = User.objects.create_user(username='reader')
+        Follow.objects.create(user=reader, author=self.user)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Follow.objects.create(user=reader, author=self.user)
+        Follow.objects.get_or_create(user=reader, author=self.user)
+        self.assertEqual(Follow.objects.filter(user=reader).count(), 1)
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from ..models import Post
+from ..paginator import CursorPaginator
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        Post.objects.bulk_create(
+            Post(text=f'Текст № {i}', author=cls.user) for i in range(25)
+        )
+        # Одинаковая дата у всех постов: порядок держится на id.
+        pub_date = Post.objects.first().pub_date
+        Post.objects.update(pub_date=pub_date)
+        cls.expected = list(Post.objects.order_by('-pub_date', '-pk'))
+
+    def get_paginator(self):
+        return CursorPaginator(Post.objects.all(), 10)
+
+    def test_walk_forward_and_back(self):
+        """Проход по курсорам вперёд и назад даёт те же страницы."""
+        paginator = self.get_paginator()
+        pages = [paginator.get_page({})]
+        while pages[-1].next_cursor:
+            pages.append(
+                paginator.get_page({'after': pages[-1].next_cursor})
+            )
+        self.assertEqual(
+            [post for page in pages for post in page], self.expected
+        )
+        self.assertEqual([len(page) for page in pages], [10, 10, 5])
+        back = paginator.get_page({'before': pages[2].previous_cursor})
+        self.assertEqual(list(back), list(pages[1]))
+        first = paginator.get_page({'before': pages[1].previous_cursor})
+        self.assertEqual(list(first), list(pages[0]))
+        self.assertIsNone(first.previous_cursor)
+
+    def test_invalid_cursor_returns_first_page(self):
+        """Битый курсор ведёт на первую страницу."""
+        page = self.get_paginator().get_page({'after': 'not-a-cursor'})
+        self.assertEqual(list(page), self.expected[:10])
+
+    def test_page_without_offset_and_count(self):
+        """Страница стоит одного запроса без OFFSET и COUNT."""
+        paginator = self.get_paginator()
+        cursor = paginator.cursor_for(self.expected[14])
+        with CaptureQueriesContext(connection) as queries:
+            page = paginator.get_page({'after': cursor})
+            self.assertEqual(list(page), self.expected[15:25])
+        self.assertEqual(len(queries), 1)
+        sql = queries[0]['sql'].upper()
+        self.assertNotIn('OFFSET', sql)
+        self.assertNotIn('COUNT(', sql)
@@ -0,0 +1,49 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+from ..templatetags.post_cards import post_cards
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.posts = [
+            Post.objects.create(text=f'Текст № {i}', author=cls.user)
+            for i in range(3)
+        ]
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.user)
+        cache.clear()
+
+    def get_cards(self):
+        return post_cards(Post.objects.for_feed().order_by('pk'))
+
+    def test_cards_are_rendered_once(self):
+        """Карточки отрисовываются один раз и берутся из кэша."""
+        cards = self.get_cards()
+        self.assertIn('Текст № 0', cards[0])
+        with self.assertNumQueries(1):
+            self.assertEqual(self.get_cards(), cards)
+
+    def test_post_edit_refreshes_only_its_card(self):
+        """Редактирование поста обновляет только его карточку."""
+        cards = self.get_cards()
+        # Изменение в обход save() не меняет версию карточки.
+        Post.objects.filter(pk=self.posts[0].pk).update(text='Без версии')
+        self.authorized_client.post(
+            reverse('posts:post_edit', kwargs={'post_id': self.posts[1].pk}),
+            data={'text': 'Новый текст'},
+        )
+        new_cards = self.get_cards()
+        self.assertEqual(new_cards[0], cards[0])
+        self.assertIn('Новый текст', new_cards[1])
+        self.assertEqual(new_cards[2], cards[2])
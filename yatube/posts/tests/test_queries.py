@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueryCountTests(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        for i in range(15):
+            Post.objects.create(
+                text=f'Текст № {i}',
+                author=User.objects.create_user(
+                    username=f'Author_{i}', first_name='Имя'
+                ),
+                group=cls.group,
+            )
+            Post.objects.create(
+                text=f'Текст № {i}', author=cls.user, group=cls.group
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def test_feed_query_count(self):
+        """Страницы лент не делают запросов на каждый пост."""
+        # Группа и автор добавляют по запросу на своих страницах, профиль
+        # — ещё один на ETag (pk автора для версии его тега); лента
+        # подписок читает сессию, пользователя, авторов для дочитывания
+        # и ключи своей ленты.
+        pages = {
+            reverse('posts:index'): (self.guest_client, 1),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}):
+                (self.guest_client, 2),
+            reverse('posts:profile', kwargs={'username': self.user}):
+                (self.guest_client, 3),
+            reverse('posts:follow_index'): (self.authorized_client, 5),
+        }
+        for url, (client, queries) in pages.items():
+            with self.subTest(url=url):
+                with self.assertNumQueries(queries):
+                    response = client.get(url)
+                self.assertEqual(len(response.context['page_obj']), 10)
@@ -0,0 +1,95 @@
+import re
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from ..models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+FULL_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?!.*\bINDEX\b)')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN из SQLite')
+class QueryPlanTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.group = Group.objects.create(
+            title='test-title',
+            slug='test-slug',
+            description='test-decsr',
+        )
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.reader = User.objects.create_user(username='Reader')
+        Follow.objects.create(user=cls.reader, author=cls.user)
+        cls.posts = [
+            Post.objects.create(
+                text=f'Текст № {i}', author=cls.user, group=cls.group
+            )
+            for i in range(12)
+        ]
+        Comment.objects.create(
+            post=cls.posts[0], author=cls.reader, text='Комментарий'
+        )
+
+    def setUp(self):
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.reader)
+        cache.clear()
+
+    def get_plans(self, url):
+        context = self.authorized_client.get(url).context
+        urls = [url]
+        if 'page_obj' in context and context['page_obj'].next_cursor:
+            urls.append(f"{url}?after={context['page_obj'].next_cursor}")
+        plans = []
+        for page_url in urls:
+            cache.clear()
+            with CaptureQueriesContext(connection) as queries:
+                self.authorized_client.get(page_url)
+            for query in queries:
+                with connection.cursor() as cursor:
+                    cursor.execute('EXPLAIN QUERY PLAN ' + query['sql'])
+                    plans.extend(
+                        (query['sql'], row[-1]) for row in cursor.fetchall()
+                    )
+        return plans
+
+    def assertIndexedPlans(self, url):
+        """Нет ни полного прохода по таблице, ни сортировки в B-дереве.
+
+        Проход по подзапросу (SCAN recent) полным сканированием не
+        считается: он читает уже отобранные по индексу строки.
+        """
+        tables = connection.introspection.table_names()
+        for sql, detail in self.get_plans(url):
+            with self.subTest(url=url, sql=sql):
+                scan = FULL_SCAN.match(detail)
+                self.assertFalse(scan and scan.group(1) in tables, detail)
+                self.assertNotIn('TEMP B-TREE', detail)
+
+    def test_listing_queries_use_indexes(self):
+        """Запросы лент и страницы поста идут по индексам без сортировки."""
+        for url in (
+            reverse('posts:index'),
+            reverse('posts:group_list', kwargs={'slug': self.group.slug}),
+            reverse('posts:profile', kwargs={'username': self.user}),
+            reverse('posts:post_detail', kwargs={'post_id': self.posts[0].pk}),
+        ):
+            self.assertIndexedPlans(url)
+
+    def test_follow_feed_queries_use_indexes(self):
+        """Запросы ленты подписок идут по индексам.
+
+        Движок join не проверяется: слияние лент нескольких авторов в
+        одном запросе всегда сортируется во временном B-дереве.
+        """
+        for engine in ('timeline', 'merge'):
+            with self.settings(FOLLOW_FEED_ENGINE=engine):
+                self.assertIndexedPlans(reverse('posts:follow_index'))
@@ -0,0 +1,76 @@
+from urllib.parse import quote
+
+from django.contrib.auth import get_user_model
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from ..models import Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+        cls.rare = Post.objects.create(
+            text='Котики <b>спят</b> днём, а ночью ловят мышей.',
+            author=cls.user,
+        )
+        cls.often = Post.objects.create(
+            text='Котики, котики и ещё раз КОТИКИ.', author=cls.user
+        )
+        Post.objects.create(text='Собаки гуляют.', author=cls.user)
+
+    def search(self, query):
+        return list(Post.objects.search(query))
+
+    def test_search_is_ranked(self):
+        """Поиск без учёта регистра и по префиксу, лучшие совпадения выше."""
+        self.assertEqual(self.search('КОТИК'), [self.often, self.rare])
+        self.assertEqual(self.search('котики мышей'), [self.rare])
+        self.assertEqual(self.search('"OR * ('), [])
+        self.assertEqual(self.search(''), [])
+
+    def test_index_follows_changes(self):
+        """Индекс меняется вместе с постами, в том числе при update."""
+        post = Post.objects.create(text='Попугай', author=self.user)
+        self.assertEqual(self.search('попугай'), [post])
+        Post.objects.filter(pk=post.pk).update(text='Хомяк')
+        self.assertEqual(self.search('попугай'), [])
+        self.assertEqual(self.search('хомяк'), [post])
+        post.delete()
+        self.assertEqual(self.search('хомяк'), [])
+
+    def test_search_page(self):
+        """Страница поиска листается и подсвечивает найденное."""
+        Post.objects.bulk_create(
+            Post(text=f'Котики № {i}', author=self.user) for i in range(12)
+        )
+        client = Client()
+        url = reverse('posts:search')
+        response = client.get(url, {'q': 'котики'})
+        page_obj = response.context['page_obj']
+        self.assertEqual(len(page_obj), 10)
+        self.assertContains(
+            response, f'?q={quote("котики")}&amp;after={page_obj.next_cursor}'
+        )
+        response = client.get(
+            url, {'q': 'котики', 'after': page_obj.next_cursor}
+        )
+        self.assertEqual(len(response.context['page_obj']), 4)
+        response = client.get(url, {'q': 'спят'})
+        self.assertContains(response, '&lt;b&gt;<mark>спят</mark>&lt;/b&gt;')
+
+    def test_admin_search(self):
+        """Поиск в админке идёт через полнотекстовый индекс."""
+        admin = User.objects.create_superuser('admin', 'a@a.ru', 'pass')
+        client = Client()
+        client.force_login(admin)
+        response = client.get(
+            reverse('admin:posts_post_changelist'), {'q': 'котики'}
+        )
+        self.assertCountEqual(
+            response.context['cl'].result_list, [self.rare, self.often]
+        )
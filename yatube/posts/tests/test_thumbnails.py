@@ -0,0 +1,181 @@
+import shutil
+import tempfile
+import threading
+import time
+from http import HTTPStatus
+from io import BytesIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from .. import thumbnails
+from ..models import Post
+
+User = get_user_model()
+TEMP_MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+SMALL_GIF = (
+    b'\x47\x49\x46\x38\x39\x61\x02\x00'
+    b'\x01\x00\x80\x00\x00\x00\x00\x00'
+    b'\xFF\xFF\xFF\x21\xF9\x04\x00\x00'
+    b'\x00\x00\x00\x2C\x00\x00\x00\x00'
+    b'\x02\x00\x01\x00\x00\x02\x02\x0C'
+    b'\x0A\x00\x3B'
+)
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT, THUMBNAIL_WORKERS=0)
+class ThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        # Одинаковые картинки делят файл и миниатюры: каждый тест
+        # начинает с пустого каталога.
+        self.addCleanup(shutil.rmtree, TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+
+    def get_thumbnail(self):
+        _, _, geometry, options = next(thumbnails.variants())
+        return default.backend.get_thumbnail(
+            self.post.image, geometry, **options
+        )
+
+    def test_page_does_not_draw_thumbnail(self):
+        """Страница без готовой миниатюры показывает исходную картинку."""
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, f'src="{self.post.image.url}"')
+        self.assertIsNone(self.get_thumbnail())
+
+    def test_generated_thumbnail_replaces_fallback(self):
+        """Готовые варианты сменяют исходную картинку на страницах."""
+        Client().get(reverse('posts:index'))
+        updated = self.post.updated
+        thumbnails._submit(self.post.image.name)
+        thumbnail = self.get_thumbnail()
+        self.assertTrue(thumbnail.exists())
+        self.post.refresh_from_db()
+        self.assertGreater(self.post.updated, updated)
+        response = Client().get(reverse('posts:index'))
+        self.assertContains(response, f'{thumbnail.url} 480w')
+        self.assertNotContains(response, f'src="{self.post.image.url}"')
+
+    def test_picture_has_all_variants(self):
+        """Картинка отдаётся во всех форматах и ширинах из настроек."""
+        thumbnails.generate(self.post.image.name)
+        response = Client().get(
+            reverse('posts:post_detail', kwargs={'post_id': self.post.pk})
+        )
+        self.assertContains(response, '<source type="image/webp"')
+        for image_format, width, geometry, options in thumbnails.variants():
+            with self.subTest(format=image_format, width=width):
+                thumbnail = default.backend.get_thumbnail(
+                    self.post.image, geometry, **options
+                )
+                self.assertEqual(thumbnail.width, width)
+                with thumbnail.storage.open(thumbnail.name) as file:
+                    self.assertEqual(Image.open(file).format, image_format)
+                self.assertContains(response, f'{thumbnail.url} {width}w')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+class SignedThumbnailTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username='Test_user')
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(shutil.rmtree, TEMP_MEDIA_ROOT, ignore_errors=True)
+        self.post = Post.objects.create(
+            text='Пост с картинкой',
+            author=self.user,
+            image=SimpleUploadedFile('small.gif', SMALL_GIF, 'image/gif'),
+        )
+        _, _, geometry, options = next(thumbnails.variants())
+        self.url = thumbnails.SignedThumbnailBackend().get_thumbnail(
+            self.post.image, geometry, **options
+        ).url
+
+    def test_thumbnail_view(self):
+        """Миниатюра рисуется при первом запросе подписанного адреса."""
+        response = Client().get(self.url)
+        self.assertEqual(response.status_code, HTTPStatus.OK)
+        self.assertEqual(response['Content-Type'], 'image/webp')
+        self.assertIn('immutable', response['Cache-Control'])
+        with Image.open(BytesIO(b''.join(response.streaming_content))) as im:
+            self.assertEqual(im.size, (480, 170))
+        forged = self.url.replace('/thumbnails/', '/thumbnails/x')
+        response = Client().get(forged)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+    def test_url_is_stable(self):
+        """Адрес миниатюры не зависит от времени и умолчаний."""
+        _, _, geometry, options = next(thumbnails.variants())
+        backend = thumbnails.SignedThumbnailBackend()
+        with patch('time.time', return_value=time.time() + 3600):
+            url = backend.get_thumbnail(
+                self.post.image, geometry, **options
+            ).url
+        self.assertEqual(url, self.url)
+        defaults = backend.get_thumbnail(
+            self.post.image, geometry,
+            **{**thumbnails.DeferredThumbnailBackend.default_options,
+               **options}
+        ).url
+        self.assertEqual(defaults, self.url)
+
+    def test_concurrent_requests_share_generation(self):
+        """Одновременные запросы миниатюры ждут одну генерацию."""
+        token = self.url.split('/')[-2]
+        generated = []
+
+        def slow_draw(backend, *args, **kwargs):
+            # Без kvstore: к базе теста из других потоков не попасть.
+            generated.append(args)
+            time.sleep(0.1)
+            _, thumbnail = thumbnails.DeferredThumbnailBackend(
+            ).get_thumbnail_file(*args, **kwargs)
+            default.storage.save(thumbnail.name, ContentFile(SMALL_GIF))
+            return thumbnail
+
+        with patch.object(
+            thumbnails.ThumbnailBackend, 'get_thumbnail', slow_draw
+        ):
+            threads = [
+                threading.Thread(
+                    target=thumbnails.get_signed_thumbnail, args=[token]
+                )
+                for _ in range(4)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(generated), 1)
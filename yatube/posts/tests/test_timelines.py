@@ -0,0 +1,121 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+
+from ..models import Follow, Post, TimelineEntry
+from ..timelines import TimelinePaginator, get_follow_paginator
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        cls.author = User.objects.create_user(username='Author')
+        cls.other = User.objects.create_user(username='Other')
+
+    def get_feed(self):
+        paginator = TimelinePaginator(self.reader, 10)
+        return list(paginator.get_page({}))
+
+    def get_joined_feed(self):
+        return list(Post.objects.filter(
+            author__following__user=self.reader
+        ).order_by('-pub_date', '-pk')[:10])
+
+    def test_new_post_is_fanned_out(self):
+        """Новый пост попадает в ленты подписчиков автора."""
+        Follow.objects.create(user=self.reader, author=self.author)
+        post = Post.objects.create(text='Пост', author=self.author)
+        Post.objects.create(text='Чужой пост', author=self.other)
+        self.assertTrue(
+            TimelineEntry.objects.filter(user=self.reader, post=post).exists()
+        )
+        self.assertEqual(self.get_feed(), [post])
+
+    def test_follow_backfills_and_unfollow_prunes(self):
+        """Подписка дозаполняет ленту, отписка очищает её."""
+        posts = [
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            for i in range(3)
+        ]
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.assertEqual(self.get_feed(), posts[::-1])
+        Follow.objects.filter(user=self.reader, author=self.author).delete()
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.get_feed(), [])
+
+    @override_settings(FEED_FANOUT_LIMIT=0)
+    def test_pull_author_is_merged_on_read(self):
+        """Посты популярных авторов дочитываются при показе ленты."""
+        with self.settings(FEED_FANOUT_LIMIT=1):
+            Follow.objects.create(user=self.reader, author=self.other)
+        Follow.objects.create(user=self.reader, author=self.author)
+        for i in range(8):
+            Post.objects.create(text=f'Пост {i}', author=self.author)
+            with self.settings(FEED_FANOUT_LIMIT=1):
+                Post.objects.create(text=f'Пост {i}', author=self.other)
+        self.assertFalse(
+            TimelineEntry.objects.filter(post__author=self.author)
+        )
+        self.assertEqual(self.get_feed(), self.get_joined_feed())
+
+
+class FollowFeedEngineTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.reader = User.objects.create_user(username='Reader')
+        authors = [
+            User.objects.create_user(username=f'Author_{i}')
+            for i in range(3)
+        ]
+        for author in authors:
+            Follow.objects.create(user=cls.reader, author=author)
+        for i in range(8):
+            for author in authors:
+                Post.objects.create(text=f'Пост {i}', author=author)
+        Post.objects.create(
+            text='Чужой пост',
+            author=User.objects.create_user(username='Other')
+        )
+        cls.expected = list(Post.objects.filter(
+            author__following__user=cls.reader
+        ).order_by('-pub_date', '-pk'))
+
+    def setUp(self):
+        cache.clear()
+
+    def walk(self, per_page=5):
+        paginator = get_follow_paginator(self.reader, per_page)
+        pages = [paginator.get_page({})]
+        while pages[-1].next_cursor:
+            pages.append(
+                paginator.get_page({'after': pages[-1].next_cursor})
+            )
+        back = paginator.get_page({'before': pages[-1].previous_cursor})
+        self.assertEqual(list(back), list(pages[-2]))
+        return [post for page in pages for post in page]
+
+    def test_engines_return_same_feed(self):
+        """Все движки ленты подписок отдают одинаковую ленту."""
+        for engine in ('join', 'timeline', 'merge'):
+            with self.subTest(engine=engine):
+                with self.settings(FOLLOW_FEED_ENGINE=engine):
+                    self.assertEqual(self.walk(), self.expected)
+
+    @override_settings(FOLLOW_FEED_ENGINE='merge', FEED_AUTHOR_CACHE_SIZE=4)
+    def test_merge_engine_falls_back_past_cached_posts(self):
+        """Движок merge дочитывает из базы посты старше кэшей авторов."""
+        self.assertEqual(self.walk(), self.expected)
+
+    @override_settings(FOLLOW_FEED_ENGINE='merge')
+    def test_merge_engine_sees_new_post(self):
+        """Новый пост сбрасывает кэш последних постов автора."""
+        self.walk()
+        post = Post.objects.create(
+            text='Новый пост', author=self.expected[0].author
+        )
+        self.assertEqual(self.walk()[0], post)
@@ -165,34 +165,27 @@ class PostPagesTests(TestCase):
             reverse('posts:group_list', kwargs={'slug': self.group.slug}),
             reverse('posts:profile', kwargs={'username': self.user})
         ]
-        # Подсчет кол-ва страниц
-        num = (len(self.test_posts) // 10) + 1
         for page in pages_with_paginator:
-            # Если одна страница в паджинаторе, то подсчитываем кол-во постов
-            if num == 1:
-                response = self.authorized_client.get(
-                    page + '?page=' + str(num)
-                )
-                self.assertEqual(
-                    len(response.context['page_obj']),
-                    len(self.test_posts)
-                )
-            # Если несколько страниц, то проверяем количество на первой и
-            # последних страницах
-            else:
-                response_first = self.authorized_client.get(
-                    page + '?page=' + '1'
-                )
+            with self.subTest(page=page):
+                response_first = self.authorized_client.get(page)
+                page_first = response_first.context['page_obj']
+                self.assertEqual(len(page_first), 10)
+                self.assertIsNone(page_first.previous_cursor)
                 response_last = self.authorized_client.get(
-                    page + '?page=' + str(num)
+                    page + '?after=' + page_first.next_cursor
                 )
+                page_last = response_last.context['page_obj']
                 self.assertEqual(
-                    len(response_first.context['page_obj']),
-                    10
+                    len(page_last),
+                    (len(self.test_posts) % 10)
+                )
+                self.assertIsNone(page_last.next_cursor)
+                response_back = self.authorized_client.get(
+                    page + '?before=' + page_last.previous_cursor
                 )
                 self.assertEqual(
-                    len(response_last.context['page_obj']),
-                    (len(self.test_posts) % 10)
+                    list(response_back.context['page_obj']),
+                    list(page_first)
                 )
 
     def test_post_in_index_group_profile_create(self):
@@ -306,22 +299,50 @@ class PostPagesTests(TestCase):
         self.assertEqual(comment_text, test_comment.text)
 
     def test_index_page_cache(self):
-        """Тестирование кэша."""
-        posts_count = Post.objects.count()
+        """Тестирование кэша: страница берётся из кэша,
+        пока не изменились посты.
+        """
         response = self.authorized_client.get(self.index_url).content
-        Post.objects.create(
-            text="Тест кэша",
-            author=self.user
+        # Обновление без сигналов не сбрасывает кэш.
+        Post.objects.filter(pk=self.test_posts[-1].pk).update(
+            text='Изменено в обход кэша'
         )
-        self.assertEqual(Post.objects.count(), posts_count + 1)
         self.assertEqual(
             response,
             self.authorized_client.get(self.index_url).content
         )
-        cache.clear()
-        self.assertNotEqual(
-            response,
-            self.authorized_client.get(self.index_url).content
+        Post.objects.create(
+            text="Тест кэша",
+            author=self.user
+        )
+        response_new = self.authorized_client.get(self.index_url).content
+        self.assertNotEqual(response, response_new)
+        self.assertIn('Тест кэша'.encode(), response_new)
+
+    def test_cached_pages_keep_per_user_parts(self):
+        """Кэш страниц общий, но переключатель лент и кнопка подписки
+        отрисовываются для каждого пользователя.
+        """
+        switcher_url = reverse('posts:follow_index').encode()
+        profile_url = reverse('posts:profile', kwargs={'username': self.user})
+        follow_url = reverse(
+            'posts:profile_follow', kwargs={'username': self.user}
+        ).encode()
+        self.authorized_client_follower.force_login(self.user_follower)
+        guest_index = self.guest_client.get(self.index_url).content
+        self.assertNotIn(switcher_url, guest_index)
+        self.assertIn(
+            switcher_url, self.authorized_client.get(self.index_url).content
+        )
+        self.assertNotIn(
+            follow_url, self.guest_client.get(profile_url).content
+        )
+        self.assertIn(
+            follow_url,
+            self.authorized_client_follower.get(profile_url).content
+        )
+        self.assertNotIn(
+            follow_url, self.authorized_client.get(profile_url).content
         )
 
     def test_follow(self):
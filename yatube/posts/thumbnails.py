@@ -0,0 +1,297 @@
+"""Миниатюры картинок постов рисуются вне отрисовки страниц.
+
+После сохранения картинки (post_create, post_edit) все её варианты
+(см. variants) рисуются в пуле из THUMBNAIL_WORKERS процессов.
+
+Тег {% thumbnail %} работает через бэкенд из THUMBNAIL_BACKEND:
+
+DeferredThumbnailBackend
+    Только читает готовую миниатюру из kvstore sorl-thumbnail, а если
+    её ещё нет, ставит картинку в очередь и возвращает None: тег
+    {% post_picture %} покажет исходную картинку, {% thumbnail %} —
+    ветку {% empty %}.
+SignedThumbnailBackend
+    Сразу отдаёт подписанный адрес представления posts:thumbnail, не
+    трогая ни картинку, ни kvstore. Миниатюру рисует представление при
+    первом запросе адреса.
+"""
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core import signing
+from django.core.cache import cache
+from django.db import transaction
+from django.urls import reverse
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+from sorl.thumbnail.kvstores.base import add_prefix
+
+from core import workers
+
+from .models import Post
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+SIGNING_SALT = 'posts.thumbnails'
+
+# Замки генерации по подписанным адресам: ключ миниатюры попадает в
+# одну из LOCK_STRIPES полос.
+LOCK_STRIPES = 64
+
+_pool = None
+_pending = set()
+_lock = threading.Lock()
+_stripe_locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+
+
+class DeferredThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail, который не рисует миниатюры в запросе."""
+
+    def get_options(self, source, options):
+        """Параметры миниатюры с умолчаниями, как в get_thumbnail."""
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def get_thumbnail_file(self, file_, geometry_string, **options):
+        """Исходная картинка и файл её миниатюры, без генерации."""
+        source = ImageFile(file_)
+        options = self.get_options(source, options)
+        thumbnail = ImageFile(
+            self._get_thumbnail_filename(source, geometry_string, options),
+            default.storage
+        )
+        return source, thumbnail
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source, thumbnail = self.get_thumbnail_file(
+            file_, geometry_string, **options
+        )
+        cached = default.kvstore.get(thumbnail)
+        if cached:
+            touch(cached)
+            return cached
+        if source.exists():
+            schedule(source.name)
+        return None
+
+
+class SignedThumbnail:
+    """Миниатюра, известная пока только по адресу."""
+
+    def __init__(self, url):
+        self.url = url
+
+    def __str__(self):
+        return self.url
+
+
+class SignedThumbnailBackend(ThumbnailBackend):
+    """Бэкенд sorl-thumbnail с подписанными адресами миниатюр."""
+
+    def get_thumbnail(self, file_, geometry_string, **options):
+        if not file_:
+            raise ValueError('falsey file_ argument in get_thumbnail()')
+        source = ImageFile(file_)
+        # Подписываются параметры вместе с умолчаниями и без отметки
+        # времени: адрес миниатюры не меняется и кэшируется навсегда.
+        options = DeferredThumbnailBackend().get_options(
+            source, dict(options)
+        )
+        payload = json.dumps(
+            [source.name, geometry_string, sorted(options.items())],
+            separators=(',', ':')
+        )
+        token = signing.Signer(salt=SIGNING_SALT).sign(
+            signing.b64_encode(payload.encode()).decode()
+        )
+        return SignedThumbnail(reverse('posts:thumbnail', args=[token]))
+
+
+def touch(thumbnail):
+    """Отмечает показ миниатюры временем изменения её файла.
+
+    По нему collect_media находит давно не показанные миниатюры. Файл
+    трогается не чаще раза в THUMBNAIL_TOUCH_INTERVAL на процесс.
+    """
+    if not cache.add(
+        f'thumbnail_touch:{thumbnail.key}',
+        True,
+        settings.THUMBNAIL_TOUCH_INTERVAL
+    ):
+        return
+    try:
+        os.utime(thumbnail.storage.path(thumbnail.name))
+    except (NotImplementedError, OSError):
+        pass
+
+
+@contextmanager
+def _single_flight(key):
+    """Пускает к генерации миниатюры key один поток одного процесса.
+
+    Потоки процесса ждут threading.Lock полосы, процессы — flock на
+    файле-замке той же полосы.
+    """
+    stripe = int(hashlib.md5(key.encode()).hexdigest(), 16) % LOCK_STRIPES
+    with _stripe_locks[stripe]:
+        if fcntl is None:
+            yield
+            return
+        path = os.path.join(
+            tempfile.gettempdir(), f'yatube-thumbnail-{stripe}.lock'
+        )
+        with open(path, 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            yield
+
+
+def source_file(name):
+    """Картинка поста name в хранилище поля Post.image.
+
+    Ключ миниатюр sorl-thumbnail зависит от хранилища картинки, поэтому
+    по одному имени картинку открывать нельзя.
+    """
+    return Post(image=name).image
+
+
+def get_signed_thumbnail(token):
+    """Готовая миниатюра по подписанному адресу token.
+
+    Отсутствующая миниатюра рисуется; одновременные запросы одной
+    миниатюры ждут одну генерацию. Возвращает None, если исходной
+    картинки нет. Неверная подпись — signing.BadSignature.
+    """
+    payload = signing.Signer(salt=SIGNING_SALT).unsign(token)
+    name, geometry, options = json.loads(
+        signing.b64_decode(payload.encode())
+    )
+    options = dict(options)
+    image = source_file(name)
+    source, thumbnail = DeferredThumbnailBackend().get_thumbnail_file(
+        image, geometry, **options
+    )
+    if thumbnail.exists():
+        touch(thumbnail)
+        return thumbnail
+    with _single_flight(thumbnail.name):
+        if thumbnail.exists():
+            return thumbnail
+        if not source.exists():
+            return None
+        return ThumbnailBackend().get_thumbnail(image, geometry, **options)
+
+
+def variants():
+    """Варианты картинки поста: (формат, ширина, геометрия, параметры).
+
+    Параметры совпадают с параметрами тега {% thumbnail %} и задают имя
+    миниатюры, поэтому один раз нарисованный вариант переиспользуется.
+    """
+    aspect_width, aspect_height = settings.POST_IMAGE_ASPECT
+    for image_format in settings.POST_IMAGE_FORMATS:
+        for width in settings.POST_IMAGE_WIDTHS:
+            height = round(width * aspect_height / aspect_width)
+            options = {
+                'crop': 'center',
+                'upscale': True,
+                'format': image_format,
+            }
+            yield image_format, width, f'{width}x{height}', options
+
+
+def generate(name):
+    """Рисует все варианты картинки name; выполняется в пуле."""
+    backend = ThumbnailBackend()
+    image = source_file(name)
+    for _, _, geometry, options in variants():
+        backend.get_thumbnail(image, geometry, **options)
+
+
+def _get_pool():
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.THUMBNAIL_WORKERS,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=workers.setup,
+            initargs=(settings.CACHES,),
+        )
+    return _pool
+
+
+def _refresh_posts(name):
+    """Показывает готовые миниатюры картинки name на страницах.
+
+    kvstore кэширует промахи, а миниатюры записал другой процесс,
+    поэтому промахи сбрасываются. Пока миниатюр не было, карточки и
+    страницы постов с этой картинкой отрисовались с запасной картинкой:
+    сохранение поста сбрасывает их кэш.
+    """
+    backend = DeferredThumbnailBackend()
+    image = source_file(name)
+    for _, _, geometry, options in variants():
+        _, thumbnail = backend.get_thumbnail_file(image, geometry, **options)
+        default.kvstore.cache.delete(add_prefix(thumbnail.key))
+    for post in Post.objects.filter(image=name):
+        post.save(update_fields=['updated'])
+
+
+def _finish(name, future):
+    with _lock:
+        _pending.discard(name)
+    error = future.exception()
+    if error is not None:
+        logger.error('Не удалось нарисовать миниатюры %s: %r', name, error)
+        return
+    _refresh_posts(name)
+
+
+def _submit(name):
+    with _lock:
+        if name in _pending:
+            return
+        _pending.add(name)
+    if not settings.THUMBNAIL_WORKERS:
+        try:
+            generate(name)
+        finally:
+            with _lock:
+                _pending.discard(name)
+        _refresh_posts(name)
+        return
+    future = _get_pool().submit(generate, name)
+    future.add_done_callback(lambda future: _finish(name, future))
+
+
+def schedule(name):
+    """Ставит картинку name в очередь на миниатюры.
+
+    Задача отправляется после фиксации транзакции: процесс пула должен
+    увидеть и файл, и запись поста.
+    """
+    transaction.on_commit(lambda: _submit(name))
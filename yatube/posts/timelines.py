@@ -0,0 +1,245 @@
+"""Движки ленты подписок, выбираются настройкой FOLLOW_FEED_ENGINE.
+
+join
+    Прямой запрос Post с JOIN по Follow.
+timeline
+    Материализованная лента (fan-out on write): новый пост
+    раскладывается в TimelineEntry всех подписчиков автора, поэтому
+    лента читается диапазоном по индексу (user, pub_date). Посты
+    авторов, у которых подписчиков больше FEED_FANOUT_LIMIT, не
+    раскладываются, а дочитываются из Post при показе ленты.
+merge
+    Слияние (k-way merge) кэшированных списков последних постов
+    каждого автора из подписок, без записи в ленты читателей.
+"""
+import heapq
+from itertools import islice
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Follow, Post, TimelineEntry, UserStats
+from .paginator import CursorPaginator
+
+
+def is_pull_author(author_id):
+    """Проверяет, читаются ли посты автора по запросу."""
+    return UserStats.objects.filter(
+        user_id=author_id,
+        followers_count__gt=settings.FEED_FANOUT_LIMIT
+    ).exists()
+
+
+def _insert_entries(entries):
+    TimelineEntry.objects.bulk_create(
+        entries,
+        batch_size=settings.FEED_FANOUT_BATCH_SIZE,
+        ignore_conflicts=True
+    )
+
+
+def fanout_post(post):
+    """Добавляет пост в ленты подписчиков автора."""
+    if is_pull_author(post.author_id):
+        return
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list('user_id', flat=True)
+    _insert_entries(
+        TimelineEntry(user_id=user_id, post=post, pub_date=post.pub_date)
+        for user_id in follower_ids.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту пользователя уже вышедшие посты автора."""
+    if is_pull_author(author_id):
+        return
+    posts = Post.objects.filter(
+        author_id=author_id
+    ).values_list('pk', 'pub_date')
+    _insert_entries(
+        TimelineEntry(user_id=user_id, post_id=pk, pub_date=pub_date)
+        for pk, pub_date in posts.iterator()
+    )
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты пользователя."""
+    TimelineEntry.objects.filter(
+        user_id=user_id, post__author_id=author_id
+    ).delete()
+
+
+class TimelinePaginator(CursorPaginator):
+    """Курсорная лента подписок поверх TimelineEntry.
+
+    Ключи записей ленты сливаются с ключами постов авторов, читаемых
+    по запросу, после чего сами посты загружаются одним запросом.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.for_feed(), per_page)
+        self.entries = TimelineEntry.objects.filter(user=user)
+        self.pull_authors = list(
+            Follow.objects.filter(
+                user=user,
+                author__stats__followers_count__gt=settings.FEED_FANOUT_LIMIT
+            ).values_list('author_id', flat=True)
+        )
+
+    def seek(self, cursor, newer=False):
+        streams = [
+            self.seek_queryset(
+                self.entries.values_list('pub_date', 'post_id'),
+                ('pub_date', 'post_id'), cursor, newer
+            ),
+        ]
+        if self.pull_authors:
+            pulled = self.object_list.filter(author_id__in=self.pull_authors)
+            streams.append(self.seek_queryset(
+                pulled.values_list('pub_date', 'pk'),
+                ('pub_date', 'pk'), cursor, newer
+            ))
+        keys = merge_keys(streams, newer)
+        return load_posts(self.object_list, islice(keys, self.per_page + 1))
+
+
+class JoinPaginator(CursorPaginator):
+    """Лента подписок одним запросом с JOIN по Follow."""
+
+    def __init__(self, user, per_page):
+        super().__init__(
+            Post.objects.filter(author__following__user=user).for_feed(),
+            per_page
+        )
+
+
+class MergePaginator(CursorPaginator):
+    """Лента подписок слиянием кэшей последних постов авторов.
+
+    Кэш автора хранит не больше FEED_AUTHOR_CACHE_SIZE ключей. Если
+    страница уходит глубже самого короткого обрезанного кэша, она
+    читается из Post по списку авторов.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.for_feed(), per_page)
+        self.author_ids = list(
+            Follow.objects.filter(user=user).values_list(
+                'author_id', flat=True
+            )
+        )
+
+    def seek(self, cursor, newer=False):
+        limit = self.per_page + 1
+        streams = list(recent_post_keys(self.author_ids).values())
+        tails = [
+            keys[-1] for keys in streams
+            if len(keys) >= settings.FEED_AUTHOR_CACHE_SIZE
+        ]
+        # Старше горизонта кэши авторов могут быть неполными.
+        horizon = max(tails) if tails else None
+        if newer:
+            streams = [
+                [key for key in reversed(keys) if key > cursor]
+                for keys in streams
+            ]
+        elif cursor is not None:
+            streams = [
+                [key for key in keys if key < cursor] for keys in streams
+            ]
+        keys = list(islice(merge_keys(streams, newer), limit))
+        if horizon is None:
+            complete = True
+        elif newer:
+            complete = cursor >= horizon
+        else:
+            complete = len(keys) == limit and keys[-1] >= horizon
+        if not complete:
+            posts = self.object_list.filter(author_id__in=self.author_ids)
+            return list(self.seek_queryset(posts, self.keys, cursor, newer))
+        return load_posts(self.object_list, keys)
+
+
+FOLLOW_FEED_ENGINES = {
+    'join': JoinPaginator,
+    'timeline': TimelinePaginator,
+    'merge': MergePaginator,
+}
+
+
+def get_follow_paginator(user, per_page):
+    """Возвращает паджинатор ленты подписок выбранного движка."""
+    engine = FOLLOW_FEED_ENGINES[settings.FOLLOW_FEED_ENGINE]
+    return engine(user, per_page)
+
+
+def load_posts(posts, keys):
+    """Загружает посты по упорядоченным ключам одним запросом."""
+    post_ids = [pk for _, pk in keys]
+    posts = posts.in_bulk(post_ids)
+    return [posts[pk] for pk in post_ids if pk in posts]
+
+
+# Последние FEED_AUTHOR_CACHE_SIZE постов каждого автора за один запрос.
+RECENT_POSTS_SQL = """
+    SELECT id, author_id, pub_date FROM (
+        SELECT id, author_id, pub_date, ROW_NUMBER() OVER (
+            PARTITION BY author_id ORDER BY pub_date DESC, id DESC
+        ) AS position
+        FROM posts_post WHERE author_id IN ({authors})
+    ) recent
+    WHERE position <= %s
+"""
+
+RECENT_POSTS_BATCH_SIZE = 500
+
+
+def _recent_posts_key(author_id):
+    return f'recent_posts:{author_id}'
+
+
+def recent_post_keys(author_ids):
+    """Возвращает ключи (pub_date, id) последних постов авторов.
+
+    Списки читаются из кэша одним get_many, недостающие собираются из
+    Post одним запросом на пачку авторов и кладутся в кэш.
+    """
+    cache_keys = {_recent_posts_key(pk): pk for pk in author_ids}
+    streams = {
+        cache_keys[key]: keys
+        for key, keys in cache.get_many(cache_keys).items()
+    }
+    missing = [pk for pk in author_ids if pk not in streams]
+    fetched = {pk: [] for pk in missing}
+    for start in range(0, len(missing), RECENT_POSTS_BATCH_SIZE):
+        batch = missing[start:start + RECENT_POSTS_BATCH_SIZE]
+        for post in Post.objects.raw(RECENT_POSTS_SQL.format(
+            authors=', '.join(['%s'] * len(batch))
+        ), batch + [settings.FEED_AUTHOR_CACHE_SIZE]):
+            fetched[post.author_id].append((post.pub_date, post.pk))
+    # Порядок строк окна не гарантирован, а сортировка в SQL обошлась бы
+    # во временное B-дерево: списки короткие, сортируем их здесь.
+    for keys in fetched.values():
+        keys.sort(reverse=True)
+    if fetched:
+        streams.update(fetched)
+        cache.set_many(
+            {_recent_posts_key(pk): keys for pk, keys in fetched.items()},
+            settings.FEED_AUTHOR_CACHE_TIMEOUT
+        )
+    return streams
+
+
+def forget_recent_posts(author_id):
+    cache.delete(_recent_posts_key(author_id))
+
+
+def merge_keys(streams, newer=False):
+    """Сливает упорядоченные потоки ключей (pub_date, id) без повторов."""
+    last = None
+    for key in heapq.merge(*streams, reverse=not newer):
+        if key != last:
+            yield key
+        last = key
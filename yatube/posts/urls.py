@@ -1,13 +1,29 @@
-from django.urls import path
+from django.urls import path, register_converter
 
-from . import views
+from . import api, views
+from .feeds import FeedFormatConverter
+
+register_converter(FeedFormatConverter, 'feed')
 
 app_name = 'posts'
 
 urlpatterns = [
     path('', views.index, name='index'),
+    path('feed/<feed:feed_format>/', views.index_feed, name='index_feed'),
     path('group/<slug:slug>/', views.group_posts, name='group_list'),
+    path(
+        'group/<slug:slug>/feed/<feed:feed_format>/',
+        views.group_feed,
+        name='group_feed'
+    ),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/feed/<feed:feed_format>/',
+        views.profile_feed,
+        name='profile_feed'
+    ),
+    path('search/', views.search, name='search'),
+    path('thumbnails/<str:token>/', views.thumbnail, name='thumbnail'),
     path('posts/<int:post_id>/', views.post_detail, name='post_detail'),
     path('create/', views.post_create, name='post_create'),
     path('posts/<int:post_id>/edit/', views.post_edit, name='post_edit'),
@@ -17,6 +33,26 @@ urlpatterns = [
         name='add_comment'
     ),
     path('follow/', views.follow_index, name='follow_index'),
+    path('api/posts/', api.posts, name='api_posts'),
+    path('api/posts/<int:post_id>/', api.post, name='api_post'),
+    path(
+        'api/posts/<int:post_id>/comments/',
+        api.post_comments,
+        name='api_post_comments'
+    ),
+    path('api/groups/<slug:slug>/', api.group, name='api_group'),
+    path(
+        'api/groups/<slug:slug>/posts/',
+        api.group_posts,
+        name='api_group_posts'
+    ),
+    path('api/profiles/<str:username>/', api.profile, name='api_profile'),
+    path(
+        'api/profiles/<str:username>/posts/',
+        api.profile_posts,
+        name='api_profile_posts'
+    ),
+    path('api/follow/', api.follow_posts, name='api_follow'),
     path(
         'profile/<str:username>/follow/',
         views.profile_follow,
@@ -1,29 +1,84 @@
+import mimetypes
+
 from django.conf import settings
 from django.contrib.auth.decorators import login_required
-from django.core.paginator import Paginator
+from django.core import signing
+from django.http import FileResponse, Http404
 from django.shortcuts import get_object_or_404, redirect, render
+from django.urls import reverse
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition, require_safe
+
+from core import cache_tags
 
+from .feeds import feed_response
 from .forms import CommentForm, PostForm
 from .models import Follow, Group, Post, User
+from .paginator import CursorPaginator, SearchPaginator
+from .search import add_snippets
+from .thumbnails import get_signed_thumbnail
+from .thumbnails import schedule as schedule_thumbnails
+from .timelines import get_follow_paginator
+
+
+def _viewer(request):
+    """То, чем страница различается для разных читателей."""
+    return (
+        request.user.pk, request.COOKIES.get(settings.CSRF_COOKIE_NAME)
+    )
+
+
+def index_etag(request):
+    return cache_tags.etag(_viewer(request), ['feed:index'])
+
+
+def group_etag(request, slug):
+    return cache_tags.etag(_viewer(request), [f'group:{slug}'])
+
+
+def _author_id(username):
+    return User.objects.filter(
+        username=username
+    ).values_list('pk', flat=True).first()
+
 
+def profile_etag(request, username):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return cache_tags.etag(_viewer(request), [f'author:{author_id}'])
 
+
+def post_etag(request, post_id):
+    post = Post.objects.filter(pk=post_id).values_list(
+        'author_id', 'group__slug'
+    ).first()
+    if post is None:
+        return None
+    author_id, slug = post
+    tags = [f'post:{post_id}', f'author:{author_id}']
+    if slug is not None:
+        tags.append(f'group:{slug}')
+    return cache_tags.etag(_viewer(request), tags)
+
+
+@cache_tags.condition(index_etag)
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    paginator = CursorPaginator(post_list, settings.NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
     context = {
         'page_obj': page_obj,
     }
     return render(request, 'posts/index.html', context)
 
 
+@cache_tags.condition(group_etag)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    posts = group.posts.all()
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = group.posts.for_feed()
+    paginator = CursorPaginator(posts, settings.NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
     context = {
         'page_obj': page_obj,
         'group': group,
@@ -35,15 +90,17 @@ def group_posts(request, slug):
     )
 
 
+@cache_tags.condition(profile_etag)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
+    author = get_object_or_404(
+        User.objects.select_related('stats'), username=username
+    )
     user = request.user
     following = (user.is_authenticated
                  and Follow.objects.filter(author=author, user=user).exists())
-    posts = author.posts.all()
-    paginator = Paginator(posts, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    posts = author.posts.for_feed()
+    paginator = CursorPaginator(posts, settings.NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
 
     context = {
         'page_obj': page_obj,
@@ -53,8 +110,100 @@ def profile(request, username):
     return render(request, 'posts/profile.html', context)
 
 
+# Ленты одинаковы для всех читателей: ETag зависит только от тегов.
+def index_feed_etag(request, feed_format):
+    return cache_tags.etag([feed_format], ['feed:index'])
+
+
+def group_feed_etag(request, slug, feed_format):
+    return cache_tags.etag([feed_format], [f'group:{slug}'])
+
+
+def profile_feed_etag(request, username, feed_format):
+    author_id = _author_id(username)
+    if author_id is None:
+        return None
+    return cache_tags.etag([feed_format], [f'author:{author_id}'])
+
+
+@require_safe
+@condition(etag_func=index_feed_etag)
+@cache_control(public=True, no_cache=True)
+def index_feed(request, feed_format):
+    return feed_response(
+        request,
+        feed_format,
+        Post.objects.for_feed(),
+        title='Yatube',
+        link=reverse('posts:index'),
+        description='Последние обновления на сайте',
+    )
+
+
+@require_safe
+@condition(etag_func=group_feed_etag)
+@cache_control(public=True, no_cache=True)
+def group_feed(request, slug, feed_format):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(
+        request,
+        feed_format,
+        group.posts.for_feed(),
+        title=group.title,
+        link=reverse('posts:group_list', args=[group.slug]),
+        description=group.description,
+    )
+
+
+@require_safe
+@condition(etag_func=profile_feed_etag)
+@cache_control(public=True, no_cache=True)
+def profile_feed(request, username, feed_format):
+    author = get_object_or_404(User, username=username)
+    return feed_response(
+        request,
+        feed_format,
+        author.posts.for_feed(),
+        title=f'Записи {author.get_full_name() or author.username}',
+        link=reverse('posts:profile', args=[author.username]),
+        description=f'Последние записи пользователя {author.username}',
+    )
+
+
+def search(request):
+    query = request.GET.get('q', '').strip()
+    posts = Post.objects.for_feed().search(query)
+    paginator = SearchPaginator(posts, settings.NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
+    add_snippets(page_obj, query)
+    context = {
+        'page_obj': page_obj,
+        'query': query,
+    }
+    return render(request, 'posts/search.html', context)
+
+
+@require_safe
+@cache_control(public=True, max_age=60 * 60 * 24 * 365, immutable=True)
+def thumbnail(request, token):
+    """Миниатюра по подписанному адресу; адрес не меняется никогда."""
+    try:
+        image = get_signed_thumbnail(token)
+    except signing.BadSignature:
+        raise Http404
+    if image is None or not image.exists():
+        raise Http404
+    content_type, _ = mimetypes.guess_type(image.name)
+    return FileResponse(
+        image.storage.open(image.name), content_type=content_type
+    )
+
+
+@cache_tags.condition(post_etag)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, pk=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__stats', 'group'), pk=post_id
+    )
     form = CommentForm(request.POST or None)
     comment = post.comments.all()
     context = {
@@ -75,6 +224,8 @@ def post_create(request):
         post = form.save(commit=False)
         post.author = request.user
         post.save()
+        if post.image:
+            schedule_thumbnails(post.image.name)
         return redirect('posts:profile', username=request.user.username)
     return render(request, 'posts/create_or_update.html', {'form': form})
 
@@ -91,6 +242,8 @@ def post_edit(request, post_id):
     )
     if form.is_valid():
         form.save()
+        if 'image' in form.changed_data and post.image:
+            schedule_thumbnails(post.image.name)
         return redirect('posts:post_detail', post_id=post_id)
     return render(
         request,
@@ -113,10 +266,8 @@ def add_comment(request, post_id):
 
 @login_required
 def follow_index(request):
-    post_list = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(post_list, settings.NUMBER_OF_POSTS)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    paginator = get_follow_paginator(request.user, settings.NUMBER_OF_POSTS)
+    page_obj = paginator.get_page(request.GET)
     context = {
         'page_obj': page_obj,
     }
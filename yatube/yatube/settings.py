@@ -14,7 +14,7 @@ ALLOWED_HOSTS = [
 ]
 
 INSTALLED_APPS = [
-    'posts',
+    'posts.apps.PostsConfig',
     'core',
     'about',
     'users.apps.UsersConfig',
@@ -83,12 +83,33 @@ AUTH_PASSWORD_VALIDATORS = [
     },
 ]
 
+# Кэш в файле SQLite общий для всех процессов сервера (см.
+# core/sqlite_cache.py), а перед ним в каждом процессе стоит LRU в
+# памяти для ключей со штампом версии (см. core/tiered_cache.py). Тесты
+# получают свой пустой файл во временном каталоге (см.
+# core/test_runner.py), чтобы не видеть записей запущенного сервера и
+# прошлых прогонов.
 CACHES = {
     'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+        'BACKEND': 'core.tiered_cache.TieredCache',
+        'OPTIONS': {
+            'L2': 'shared',
+            'L1_MAX_ENTRIES': 1000,
+            'L1_TIMEOUT': 60,
+            'L1_KEY_PREFIXES': ['tagged.', 'post_card:'],
+        },
+    },
+    'shared': {
+        'BACKEND': 'core.sqlite_cache.SQLiteCache',
+        'LOCATION': os.path.join(BASE_DIR, 'cache.sqlite3'),
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,
+        },
+    },
 }
 
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
 LANGUAGE_CODE = 'ru'
 
 TIME_ZONE = 'UTC'
@@ -115,8 +136,81 @@ EMAIL_FILE_PATH = os.path.join(BASE_DIR, 'sent_emails')
 
 NUMBER_OF_POSTS = 10
 
+# Постов в лентах RSS, Atom и JSON Feed и сколько читать за запрос.
+FEED_ITEMS = 50
+
+FEED_WINDOW = 20
+
 CSRF_FAILURE_VIEW = 'core.views.csrf_failure'
 
 MEDIA_URL = '/media/'
 
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+
+# Движок ленты подписок: 'join', 'timeline' или 'merge'
+# (см. posts/timelines.py).
+FOLLOW_FEED_ENGINE = 'timeline'
+
+# Авторы, у которых подписчиков больше, не раскладываются по лентам
+# подписок при публикации, а дочитываются при показе ленты.
+FEED_FANOUT_LIMIT = 1000
+
+FEED_FANOUT_BATCH_SIZE = 500
+
+# Длина и время жизни кэша последних постов автора для движка 'merge'.
+FEED_AUTHOR_CACHE_SIZE = 50
+
+FEED_AUTHOR_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни страниц в кэше; новые данные сбрасывают их раньше
+# по тегам (см. core/cache_tags.py).
+PAGE_CACHE_TIMEOUT = 60 * 60 * 6
+
+# Время жизни отрисованной карточки поста; ключ карточки меняется
+# при каждом сохранении поста.
+POST_CARD_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Миниатюры картинок постов рисуются заранее в пуле процессов
+# (см. posts/thumbnails.py); 0 — рисовать сразу в текущем процессе.
+# SignedThumbnailBackend вместо этого отдаёт подписанные адреса
+# миниатюр, которые рисуются при первом запросе.
+THUMBNAIL_BACKEND = 'posts.thumbnails.DeferredThumbnailBackend'
+
+THUMBNAIL_WORKERS = 2
+
+# Показ миниатюры не чаще раза в THUMBNAIL_TOUCH_INTERVAL обновляет
+# время изменения её файла; collect_media удаляет миниатюры, которые
+# не показывали дольше THUMBNAIL_MAX_AGE (они нарисуются заново).
+# Файлы моложе MEDIA_GC_GRACE не удаляются: их пост мог ещё не
+# сохраниться.
+THUMBNAIL_TOUCH_INTERVAL = 60 * 60 * 24
+
+THUMBNAIL_MAX_AGE = 60 * 60 * 24 * 30
+
+MEDIA_GC_GRACE = 60 * 60
+
+# Картинка поста рисуется в кадре POST_IMAGE_ASPECT каждой ширины из
+# POST_IMAGE_WIDTHS в каждом формате из POST_IMAGE_FORMATS. Последний
+# формат — для <img>, остальные — <source> в <picture>. POST_IMAGE_SIZES
+# — атрибут sizes: ширина картинки на странице.
+POST_IMAGE_ASPECT = (960, 339)
+
+POST_IMAGE_WIDTHS = [480, 960, 1440]
+
+POST_IMAGE_FORMATS = ['WEBP', 'JPEG']
+
+POST_IMAGE_SIZES = '(min-width: 992px) 960px, 100vw'
+
+# Загружаемые картинки постов (см. posts/images.py): предельные размер
+# файла и число пикселей, наибольшая сторона после уменьшения и
+# качество пережатия.
+POST_IMAGE_MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+
+POST_IMAGE_MAX_PIXELS = 50 * 10 ** 6
+
+POST_IMAGE_MAX_SIDE = 2560
+
+POST_IMAGE_QUALITY = 85
+
+# Ширина размытой заглушки картинки (см. posts/images.py), в пикселях.
+POST_IMAGE_PLACEHOLDER_WIDTH = 32